@@ -0,0 +1,93 @@
+"""
+Measure the memory used by a computed Base, with and without the __slots__ of the geometry classes.
+
+the "without" version of main5 is built from the same source with the __slots__ class attributes removed, so both
+versions run the same code. For each grid size, a design with an outline around the whole grid and a wall along
+every interior column & row line is computed (all the stages) and the bytes still allocated afterwards (as traced
+by tracemalloc) are reported per design.
+
+usage: python bench_memory.py [nbr_cols_rows ...]   (the results are also written to bench_output.txt)
+"""
+import ast
+import gc
+import sys
+import tracemalloc
+import types
+from contextlib import redirect_stdout
+from io import StringIO
+
+import main5
+
+
+def load_without_slots() -> types.ModuleType:
+    with open(main5.__file__) as fh:
+        tree = ast.parse(fh.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            node.body = [
+                stmt for stmt in node.body
+                if not (isinstance(stmt, ast.Assign) and any(getattr(t, "id", None) == "__slots__" for t in stmt.targets))
+            ] or [ast.Pass()]
+    module = types.ModuleType("main5_no_slots")
+    sys.modules[module.__name__] = module
+    exec(compile(tree, main5.__file__, "exec"), module.__dict__)
+    return module
+
+
+def build(module: types.ModuleType, n: int):
+    base = module.Base(
+        mat_thick=3,
+        fngr_len=20.0,
+        spc_len=10.0,
+        min_be_len=10.0,
+        col_widths=[50] * n,
+        row_heights=[50] * n,
+        min_tbslt_len=20,
+        max_tbslt_bt_xs=2,
+        wall_tbslt_dist=5,
+        depth=50,
+        on_center=True,
+    )
+    base.calc_agg_coords_oc()
+    base.start_path(0, 0)
+    base.extend_path(n, 0)
+    base.extend_path(n, n)
+    base.extend_path(0, n)
+    base.end_path()
+    for i in range(1, n):
+        base.add_wall((i, 0), (i, n))
+        base.add_wall((0, i), (n, i))
+    with redirect_stdout(StringIO()):
+        base.require("walls")
+    return base
+
+
+def measure(module: types.ModuleType, n: int, nbr_designs: int = 5) -> int:
+    build(module, n)    # warm up (imports, caches)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    bases = [build(module, n) for _ in range(nbr_designs)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del bases
+    return (after - before) // nbr_designs
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [5, 10, 20, 40]
+    no_slots = load_without_slots()
+    lines = [f"{'grid':>8} {'without slots':>15} {'with slots':>15} {'saved':>8}"]
+    for n in sizes:
+        without = measure(no_slots, n)
+        with_slots = measure(main5, n)
+        lines.append(f"{f'{n}x{n}':>8} {without:>15,} {with_slots:>15,} {1 - with_slots / without:>8.1%}")
+    report = "bytes per design\n" + "\n".join(lines)
+    print(report)
+    with open("bench_output.txt", "w") as fh:
+        fh.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,119 @@
 from __future__ import annotations
 
-from itertools import count
-from operator import attrgetter
-from typing import List, Tuple, Dict, Optional
+import contextlib
+import io
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass, fields, replace
+from functools import wraps
+from itertools import count, accumulate, chain, zip_longest
+from operator import attrgetter, itemgetter
+from typing import List, Tuple, Dict, Optional, Iterable, Iterator, Set, Callable
+from xml.dom import minidom
 
 from cyclic_n_tuples import cyclic_n_tuples, fwd_pair, rev_pair
 
 import svg_turtles as st
 
+# the number of micrometres in a millimetre, the unit of the coordinates of a fixed point Base (see Base)
+UM_PER_MM = 1000
+
+
+def format_um(value: int) -> str:
+    """
+    Format an integer number of micrometres as an exact decimal number of millimetres, e.g., 101500 -> 101.5
+    """
+    sign = "-" if value < 0 else ""
+    mm, um = divmod(abs(value), UM_PER_MM)
+    return f"{sign}{mm}.{um:03d}".rstrip("0").rstrip(".") if um else f"{sign}{mm}"
+
+
+#
+# geometry kernel
+#   pure functions on x, y coordinates used by the hot loops (building the paths, intersecting the walls and
+#   generating the parts) so they do not have to create Point and Line objects. The Point, Line, DimPoint and
+#   Wall methods are thin wrappers around them.
+#
+
+def seg_length(x1: float, y1: float, x2: float, y2: float) -> float:
+    """
+    Length of the horizontal or vertical segment x1, y1 - x2, y2 (see Line.length).
+    """
+    # one of the deltas is 0, so the length is the absolute value of their sum
+    return abs((y2 - y1) + (x2 - x1))
+
+
+def seg_direction(x1: float, y1: float, x2: float, y2: float) -> str:
+    """
+    Direction (left, right, up or down) of the horizontal or vertical segment x1, y1 - x2, y2 (see Line.direction).
+    """
+    if x2 == x1:
+        return "down" if y2 > y1 else "up"
+    return "right" if x2 > x1 else "left"
+
+
+def outer_length(
+    direction: str,
+    curr_corner_side: Optional[str],
+    next_corner_side: Optional[str],
+    curr_outside_x: float,
+    curr_outside_y: float,
+    curr_inside_x: float,
+    curr_inside_y: float,
+    next_outside_x: float,
+    next_outside_y: float,
+    next_inside_x: float,
+    next_inside_y: float,
+) -> float:
+    """
+    Outside length of a line from the current to the next point, adjusted for inside corners (see
+    DimPoint.outer_line_length).
+    """
+    if direction in ("left", "right"):
+        # the line is horizontal, only the x coordinates of the inside corners are adjusted
+        curr_x = curr_inside_x if curr_corner_side == "inside" else curr_outside_x
+        next_x = next_inside_x if next_corner_side == "inside" else next_outside_x
+        return seg_length(curr_x, curr_outside_y, next_x, next_outside_y)
+    elif direction in ("up", "down"):
+        curr_y = curr_inside_y if curr_corner_side == "inside" else curr_outside_y
+        next_y = next_inside_y if next_corner_side == "inside" else next_outside_y
+        return seg_length(curr_outside_x, curr_y, next_outside_x, next_y)
+    raise Exception(f"invalid direction: {direction}")
+
+
+def junction(
+    horz_x1: float, horz_x2: float, horz_y: float, vert_x: float, vert_y1: float, vert_y2: float
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Type & subtype of the intersection of a horizontal wall (horz_x1 < horz_x2) and a vertical wall
+    (vert_y1 < vert_y2), or None, None if they do not intersect (see Wall.intersect).
+    """
+    # cross intersection
+    if vert_y1 < horz_y < vert_y2 and horz_x1 < vert_x < horz_x2:
+        return "cross", None
+    # corner intersection
+    elif horz_x1 == vert_x and horz_y == vert_y1:
+        return "corner", "upper-left"
+    elif horz_x1 == vert_x and horz_y == vert_y2:
+        return "corner", "lower-left"
+    elif horz_x2 == vert_x and horz_y == vert_y1:
+        return "corner", "upper-right"
+    elif horz_x2 == vert_x and horz_y == vert_y2:
+        return "corner", "lower-right"
+    # tee intersection
+    elif vert_y1 == horz_y and horz_x1 < vert_x < horz_x2:
+        return "tee", "top"
+    elif vert_y2 == horz_y and horz_x1 < vert_x < horz_x2:
+        return "tee", "bottom"
+    elif horz_x1 == vert_x and vert_y1 < horz_y < vert_y2:
+        return "tee", "left"
+    elif horz_x2 == vert_x and vert_y1 < horz_y < vert_y2:
+        return "tee", "right"
+    # walls do not intersect
+    return None, None
+
 
 class Point:
     """
@@ -17,6 +123,9 @@ class Point:
     relative location to one another. The 3 points could be going in a clock wise orientation, a
     counter clock wise orientation or neither (i.e., the 3 points form 2 lines that are collinear).
     """
+    # the geometry classes are created in large numbers, so they use __slots__ instead of a __dict__ per instance
+    __slots__ = ("x", "y")
+
     def __init__(self, x: float, y: float):
         self.x = x
         self.y = y
@@ -83,6 +192,8 @@ class Line:
     out by the laser cutter but rather vertical lines cut into the material, i.e., the angle between the material
     being cut and the head of the laser cutter itself. And that this ange is limited to exactly 90 degrees.
     """
+    __slots__ = ("p1", "p2")
+
     def __init__(self, p1: Point, p2: Point):
         self.p1 = p1
         self.p2 = p2
@@ -116,11 +227,9 @@ class Line:
         # never diagonal, that means that one of the two variables (x_delta & y_delta) will
         # be zero and the other will be non-zero - so we can just return the absolute value
         # of the sum of the two values (as we want length to only be positive).
-        y_delta, x_delta = self.delta()
-
         # the order of the points used to define a line are not important and that is why we
-        # are using the absolute values here
-        return abs(y_delta + x_delta)
+        # are using the absolute values here (see seg_length)
+        return seg_length(self.p1.x, self.p1.y, self.p2.x, self.p2.y)
 
     def direction(self):
         """
@@ -131,19 +240,9 @@ class Line:
         Note: In our simple world, the line must be either vertical (up or down) or horizontal (left or right)
         and NOT diagonal.
         """
-        y_delta, x_delta = self.delta()
-
-        # use case x_delta (run) is 0 and y_delta (rise) is non-zero
-        if not x_delta:
-            # the line is going up if the y_delta (rise) is positive ( > 0 )
-            #   else the line is going down if the y_delta (rise) in negative ( < 0 )
-            #   the rise can never be 0 if the run is 0
-            return "down" if y_delta > 0 else "up"
-        else:
-            # the line is going left if the x_delta (run) is positive ( > 0 )
-            #   else the line is going down if the x_delta (run) in negative ( < 0 )
-            #   the run can never be 0 if the rise is 0
-            return "right" if x_delta > 0 else "left"
+        # if x_delta (run) is 0 the line is going down if y_delta (rise) is positive, else up.
+        #   otherwise the line is going right if x_delta (run) is positive, else left (see seg_direction)
+        return seg_direction(self.p1.x, self.p1.y, self.p2.x, self.p2.y)
 
 
 class Path:
@@ -178,11 +277,13 @@ class DimPoint:
         - corner_side: represents if the point lies on inside corner or an outside corner (when taking into
           consideration the relative location of the previous point AND orientation of the path
           [clock wise or counter clock wise])
-        - id: a sequential value assigned when creating a new instance of the class, values are assigned sequentially
-          and without gaps. this attribute is only for display or debugging purposes and does not serve any
-          functional purpose.
+        - id: a sequential value assigned by the DimPath that creates the point, values are assigned sequentially
+          and without gaps (from a sequence owned by the Base being built, so identical designs get identical ids).
+          this attribute is only for display or debugging purposes and does not serve any functional purpose.
         - prev: represents the previous point in the path
         - next: represents the next point in the path
+        - path & ndx: the DimPath that holds the point and the point's position in it, used to look up the start of
+          the next line and the end of the previous line in the path's jump tables (see DimPath.set_wrap)
 
     the prev & next points are initially set to None and then updated when the points are being
     added to the path. that is, you cannot set the prev attribute of a point when there is
@@ -201,7 +302,10 @@ class DimPoint:
     direction is determined (outside of the DimPoint constructor) by using the current point and next point on the
     path to form a lines object and then calling the direction method of the line object.
     """
-    seq = count(1)
+    __slots__ = (
+        "direction", "line_type", "corner_side", "outside_pt", "on_center_pt", "inside_pt", "index_point", "id",
+        "copy_id", "prev", "next", "path", "ndx", "intersections",
+    )
 
     def __init__(
         self,
@@ -212,6 +316,7 @@ class DimPoint:
         inside_pt: Point,
         index_pt: IndexPoint,
         copy_id: int = None,
+        pt_id: int = None,
     ):
         self.direction: str = direction
         self.line_type: str = line_type
@@ -220,10 +325,12 @@ class DimPoint:
         self.on_center_pt: Point = on_center_pt
         self.inside_pt: Point = inside_pt
         self.index_point: IndexPoint = index_pt
-        self.id: int = next(self.seq)
+        self.id: Optional[int] = pt_id
         self.copy_id = copy_id
         self.prev: Optional[DimPoint] = None
         self.next: Optional[DimPoint] = None
+        self.path: Optional[DimPath] = None
+        self.ndx: int = -1
         self.intersections: List[Intersection] = []
 
     def __str__(self):
@@ -265,48 +372,12 @@ class DimPoint:
         The x or y coordinated is addjust by getting the inside dimension of the DimPoint object and assigning
             curr_x, curr_y, next_x, next_y as appropriate.
         """
-        # assign curr_x & curr_y to the outside dimension x & y
-        curr_pt = self.get("outside")
-        curr_x = curr_pt.x
-        curr_y = curr_pt.y
-
-        # assign next_x & next_y to the outside dimension x & y
-        next_pt = other.get("outside")
-        next_x = next_pt.x
-        next_y = next_pt.y
-
-        # check if the current point (i.e., self) is an inside corner
-        if self.corner_side == "inside":
-            # if the current point is an outside corner we want to adjust it to the corresponding inside coordinates
-            curr_pt = self.get("inside")
-            # adjust the x coordinate to the inside x coordinate if the direction is left or right
-            if self.direction in ("left", "right"):
-                curr_x = curr_pt.x
-            # adjust the y coordinate to the inside y coordinate if the direction is up or down
-            elif self.direction in ("up", "down"):
-                curr_y = curr_pt.y
-            else:
-                raise Exception(f"invalid direction for curr_pt: {self}")
-
-        # check if the next point (i.e., other) is an inside corner
-        if other.corner_side == "inside":
-            # if the next point is an outside corner we want to adjust it to the corresponding inside coordinates
-            next_pt = other.get("inside")
-            # adjust the x coordinate to the inside x coordinate if the direction is left or right
-            if self.direction in ("left", "right"):
-                next_x = next_pt.x
-            # adjust the y coordinate to the inside y coordinate if the direction is up or down
-            elif self.direction in ("up", "down"):
-                next_y = next_pt.y
-            else:
-                raise Exception(f"invalid direction for next_pt: {other}")
-
-        # define adjusted Point objects based on the adjusted x, y coordinates
-        curr_pt = Point(curr_x, curr_y)
-        next_pt = Point(next_x, next_y)
-
-        # return the length of the adjusted line segment
-        return Line(curr_pt, next_pt).length()
+        # the adjustment is done on the coordinates by the geometry kernel (see outer_length)
+        curr_out, curr_in, next_out, next_in = self.outside_pt, self.inside_pt, other.outside_pt, other.inside_pt
+        return outer_length(
+            self.direction, self.corner_side, other.corner_side,
+            curr_out.x, curr_out.y, curr_in.x, curr_in.y, next_out.x, next_out.y, next_in.x, next_in.y,
+        )
 
     def get(self, dim: str) -> Point:
         """
@@ -334,17 +405,11 @@ class DimPoint:
         return self.prev
 
     def get_next_start(self) -> DimPoint:
-        # TODO: modify the loop condition to include line type as well as the direction
-        temp = self.next_dim_pt()
-        while temp.dire() == self.dire():
-            temp = temp.next_dim_pt()
-        return temp
+        # TODO: modify the jump table to include line type as well as the direction
+        return self.path.path_points[self.path.next_start[self.ndx]]
 
     def get_prev_end(self) -> DimPoint:
-        temp = self.prev_dim_pt()
-        while temp.dire() == self.dire():
-            temp = temp.prev_dim_pt()
-        return temp
+        return self.path.path_points[self.path.prev_end[self.ndx]]
 
 
 class DimPath:
@@ -360,6 +425,12 @@ class DimPath:
     After set_wrap has been called, no more points should be added to the path. We do not currently guard against
     this, so it is up to the developer to ensure that they do not do this.
 
+    Along with the list of DimPoint objects, the path keeps parallel arrays with the direction and corner side codes of
+    its points (see the directions & corner_sides class attributes for the codes) and, once set_wrap has been called,
+    the jump tables next_start & prev_end: for each point, the position of the first following point with a different
+    direction (the start of the next line) and of the last preceding point with a different direction (the end of the
+    previous line). The coordinates are not copied, they stay on the Point objects that update_layout moves in place.
+
     the final method of the DimPath class, uses a dictionary to look up the corner_side value for a given DimPoint.
     The corner_side value can either be inside or outside and is based on the orientation of the DimPath (clock wise
     or counter clock wise), the direction (left, right, up or down) of the current point and the direction of
@@ -380,11 +451,16 @@ class DimPath:
         },
     }
 
-    def __init__(self, path_ori: str):
+    directions: Tuple[str, ...] = ("left", "right", "up", "down")
+    corner_sides: Tuple[Optional[str], ...] = (None, "inside", "outside")
+
+    def __init__(self, path_ori: str, seq: Iterator[int] = None):
         """
         Creates an empty DimPath object with the specified orientation.
 
         :param path_ori: path orientation, either: cw (clock wise) or ccw (counter clock wise)
+        :param seq:      the sequence to assign the ids of the DimPoints from, if not given, the ids of the path's
+                         points start at 1
 
         The Path orientation is determined after all the IndexPoints for given IndexPath have been added and
         the Base class's end_path method has been called
@@ -413,7 +489,12 @@ class DimPath:
           coordinate and curr_direction and line_type (reserved / TBD) and then passed to the DimPath.add method.
         """
         self.path_ori = path_ori
+        self.seq = seq or count(1)
         self.path_points: List[DimPoint] = []
+        self.direction_codes = array("b")
+        self.corner_side_codes = array("b")
+        self.next_start = array("l")
+        self.prev_end = array("l")
 
     def get_corner_side(self, prev_dim_pt: DimPoint, curr_dim_pt: DimPoint) -> str:
         """
@@ -459,7 +540,9 @@ class DimPath:
             - additionally, the current points previous point is set and the previous points next point is set.
         """
         # create the new point
-        new_point = DimPoint(direction, line_type, outside_pt, on_center_pt, inside_pt, index_point, copy_id)
+        new_point = DimPoint(
+            direction, line_type, outside_pt, on_center_pt, inside_pt, index_point, copy_id, next(self.seq)
+        )
 
         # if there is at least one other point in the list
         if self.path_points:
@@ -469,13 +552,30 @@ class DimPath:
             if new_point.direction != prev_point.direction:
                 # set the corner side
                 new_point.corner_side = self.get_corner_side(prev_point, new_point)
-            # set tne previous point's next point and set the current point's previous point
-            prev_point.next = new_point
-            new_point.prev = prev_point
         # add the new point to the path
-        self.path_points.append(new_point)
+        self.append(new_point)
         return new_point
 
+    def append(self, dim_pt: DimPoint) -> None:
+        """
+        Add an existing DimPoint to the end of the DimPath.
+
+        :param dim_pt:  the point to add, its corner side must already be set
+        :return:        nothing
+
+        links the point with the previous point in the path and records its direction & corner side codes.
+        """
+        if self.path_points:
+            # set tne previous point's next point and set the current point's previous point
+            prev_point = self.path_points[-1]
+            prev_point.next = dim_pt
+            dim_pt.prev = prev_point
+        dim_pt.path = self
+        dim_pt.ndx = len(self.path_points)
+        self.path_points.append(dim_pt)
+        self.direction_codes.append(self.directions.index(dim_pt.direction))
+        self.corner_side_codes.append(self.corner_sides.index(dim_pt.corner_side))
+
     def set_wrap(self) -> None:
         """
         Finalizes the path by connecting the first and last points' prev & next.
@@ -490,6 +590,11 @@ class DimPath:
         - set the next point for the last point in the path to the first point it the path
         - if the first and last points are not collinear, then it will also set the corner side for
           first point in the path
+        - build the next_start & prev_end jump tables
+
+        the jump tables are built in a single pass over the direction codes: going backwards around the path (twice,
+        as the path wraps) a point's next start is the point following it when their directions differ, otherwise
+        it is the next start of the point following it. Likewise going forwards for the previous ends.
         """
         # get the first and last points in the path
         first_point = self.path_points[0]
@@ -498,10 +603,29 @@ class DimPath:
         if first_point.direction != last_point.direction:
             # set the corner side of the first point
             first_point.corner_side = self.get_corner_side(last_point, first_point)
+            self.corner_side_codes[0] = self.corner_sides.index(first_point.corner_side)
         # set the last point's next to the fisrt point and the first point's prev to the last point
         last_point.next = first_point
         first_point.prev = last_point
 
+        dirs = self.direction_codes
+        nbr_pts = len(dirs)
+        if nbr_pts < 2 or min(dirs) == max(dirs):
+            raise ValueError("a path must change direction")
+        self.next_start = array("l", bytes(nbr_pts * array("l").itemsize))
+        self.prev_end = array("l", bytes(nbr_pts * array("l").itemsize))
+        next_start = prev_end = 0
+        for k in range(2 * nbr_pts - 1, -1, -1):
+            i, j = k % nbr_pts, (k + 1) % nbr_pts
+            if dirs[i] != dirs[j]:
+                next_start = j
+            self.next_start[i] = next_start
+        for k in range(2 * nbr_pts):
+            i, j = k % nbr_pts, (k - 1) % nbr_pts
+            if dirs[i] != dirs[j]:
+                prev_end = j
+            self.prev_end[i] = prev_end
+
 
 class AggregatePoint:
     """
@@ -509,6 +633,8 @@ class AggregatePoint:
     a raw set of x y coordinates which contain min, avg and max coordinates that take the material thickness
     into consideration.
     """
+    __slots__ = ("x1", "y1", "x2", "y2", "x3", "y3")
+
     def __init__(
         self,
         x_min: float,
@@ -586,12 +712,139 @@ class AggregatePoint:
             return Point(self.x3, self.y3)
 
 
+class AggregateGrid:
+    """
+    The AggregateGrid class holds the min, avg and max coordinates for every node of the column / row grid in
+    2 flat float arrays instead of a 2 dimensional list of AggregatePoint objects.
+
+    The x coordinates of a node only depend on its column and the y coordinates only depend on its row, so the
+    grid is stored as:
+        - x_coords: 3 values (x_min, x_avg, x_max) for each of the nbr_cols + 1 column offsets
+        - y_coords: 3 values (y_min, y_avg, y_max) for each of the nbr_rows + 1 row offsets
+
+    the value for a given node and point number is then found by indexing into the 2 arrays with the slot numbers
+    looked up from the pt_slots table (0 = min, 1 = avg, 2 = max).
+
+    the coordinates are floats (typecode d) or, for a fixed point Base, integer micrometres (typecode q), in which
+    case the avg coordinate is rounded down to the micrometre.
+
+    x_ints & y_ints flag (1 byte per coordinate) the float mode coordinates that are ints, i.e., the min & max
+    coordinates of integer offsets with an integer material thickness, so the coordinates are read back (see x & y)
+    with the type that the AggregatePoint objects had (e.g., 5 and not 5.0, as written to the SVG paths).
+    """
+    # pt_slots is a tuple used to look up the (x slot, y slot) pair for a given point number (1 thru 8)
+    pt_slots: Tuple[Tuple[int, int], ...] = (
+        (-1, -1),   # pt nbr 0 is not used
+        (0, 0),     # pt nbr 1:   x_min, y_min
+        (1, 0),     # pt nbr 2:   x_avg, y_min
+        (2, 0),     # pt nbr 3:   x_max, y_min
+        (0, 1),     # pt nbr 4:   x_min, y_avg
+        (2, 1),     # pt nbr 5:   x_max, y_avg
+        (0, 2),     # pt nbr 6:   x_min, y_max
+        (1, 2),     # pt nbr 7:   x_avg, y_max
+        (2, 2),     # pt nbr 8:   x_max, y_max
+    )
+
+    def __init__(
+        self, col_offsets: Iterable[float], row_offsets: Iterable[float], mat_thick: float, typecode: str = "d"
+    ):
+        """
+        Create the AggregateGrid from the (cumulative) column and row offsets.
+
+        :param col_offsets:     the x offset of each column line (nbr_cols + 1 values, starting with 0)
+        :param row_offsets:     the y offset of each row line (nbr_rows + 1 values, starting with 0)
+        :param mat_thick:       material thickness, the distance between the min and max coordinates
+        :param typecode:        d for float coordinates, q for integer (micrometre) coordinates
+        """
+        self.mat_thick = mat_thick
+        self.typecode = typecode
+        self.x_coords, self.x_ints = self._triples(col_offsets, mat_thick)
+        self.y_coords, self.y_ints = self._triples(row_offsets, mat_thick)
+        self.nbr_x = len(self.x_coords) // 3
+        self.nbr_y = len(self.y_coords) // 3
+
+    def _triples(self, offsets: Iterable[float], mat_thick: float) -> Tuple[array, bytearray]:
+        coords = array(self.typecode)
+        ints = bytearray()
+        for c_min in offsets:
+            c_max = c_min + mat_thick
+            c_avg = (c_min + c_max) // 2 if self.typecode == "q" else (c_min + c_max) / 2.0
+            coords.extend((c_min, c_avg, c_max))
+            ints.extend((type(c_min) is int, type(c_avg) is int, type(c_max) is int))
+        return coords, ints
+
+    def x(self, i: int) -> float:
+        """
+        The x coordinate at index i of x_coords (3 * column index + slot), as an int if it is flagged as an int.
+        """
+        value = self.x_coords[i]
+        return int(value) if self.x_ints[i] else value
+
+    def y(self, i: int) -> float:
+        """
+        The y coordinate at index i of y_coords (3 * row index + slot), as an int if it is flagged as an int.
+        """
+        value = self.y_coords[i]
+        return int(value) if self.y_ints[i] else value
+
+    def __len__(self) -> int:
+        return self.nbr_x
+
+    def update(self, axis: str, offsets: Iterable[float]) -> List[float]:
+        """
+        Replace the coordinates of one axis with the ones calculated from the given offsets.
+
+        :param axis:        x (the column offsets) or y (the row offsets)
+        :param offsets:     the new offsets, the number of offsets must not change
+        :return:            a list with, for each column (or row) line, the distance it moved (0 if it did not move)
+        """
+        new_coords, new_ints = self._triples(offsets, self.mat_thick)
+        old_coords, old_ints = (self.x_coords, self.x_ints) if axis == "x" else (self.y_coords, self.y_ints)
+        if len(new_coords) != len(old_coords):
+            raise ValueError(f"the number of {axis} offsets cannot change: {len(old_coords) // 3} vs {len(new_coords) // 3}")
+        shifts = [new_coords[i] - old_coords[i] for i in range(0, len(old_coords), 3)]
+        old_coords[:] = new_coords
+        old_ints[:] = new_ints
+        return shifts
+
+    def avg(self, x_index: int, y_index: int) -> Point:
+        """
+        Get the Point object for the average point of the given node.
+
+        :param x_index: the column index of the node
+        :param y_index: the row index of the node
+        :return:        a Point object for the x_avg, y_avg coordinates of the node
+        """
+        return Point(self.x(3 * x_index + 1), self.y(3 * y_index + 1))
+
+    def get(self, x_index: int, y_index: int, pt_nbr: int) -> Point:
+        """
+        Get the x, y coordinates of the given node corresponding to the given point number.
+
+        :param x_index: the column index of the node
+        :param y_index: the row index of the node
+        :param pt_nbr:  integer value 1 through 8 (see AggregatePoint.get)
+        :return:        real x, y point obj for given point number
+        """
+        x_slot, y_slot = self.pt_slots[pt_nbr]
+        return Point(self.x(3 * x_index + x_slot), self.y(3 * y_index + y_slot))
+
+    def agg_point(self, x_index: int, y_index: int) -> AggregatePoint:
+        """
+        Build the AggregatePoint object for the given node (only used for display or debugging purposes).
+        """
+        x1, x2, x3 = (self.x(3 * x_index + slot) for slot in range(3))
+        y1, y2, y3 = (self.y(3 * y_index + slot) for slot in range(3))
+        return AggregatePoint(x1, y1, x2, y2, x3, y3)
+
+
 class IndexPoint:
     """
     the IndexPoint class is a column (x) and row (y) position into the 2 dimensional AggregatePoint array
     where the columns and rows have simple widths & heights. The use of IndexPoint allows us to describe
     a polygon's path using simple column and row integer indices instead of actual decimal x, y coordinates.
     """
+    __slots__ = ("line_type", "x_index", "y_index", "dim_point")
 
     def __init__(self, x_index: int, y_index: int, line_type: Optional[str] = None, dim_pt: DimPoint = None):
         self.line_type = line_type
@@ -614,10 +867,89 @@ class IndexPath:
     def __init__(self, start_point: IndexPoint = None, orientation: str = None):
         self.orientation = orientation
         self.index_points: List[IndexPoint] = [start_point] if start_point else []
+        # the points as they were added and, once compressed, the position of each kept point in them
+        self.original_points: List[IndexPoint] = self.index_points
+        self.point_map: Optional[array] = None
 
     def add_point(self, point: IndexPoint) -> None:
         self.index_points.append(point)
 
+    def compress(self) -> None:
+        """
+        Drop the points that lie in the middle of a run of collinear lines of the same line type.
+
+        :return:    nothing
+
+        a point is dropped when the line ending at it and the line starting at it go in the same direction and the
+        line ending at it has the same line type as the point (the line type of a point is the type of the line that
+        starts at it). When the first point of the path is dropped, the path is rotated to start at the beginning
+        of the line that contained it, so that the normalized path starts at the same place.
+
+        the points as they were added are kept in original_points and point_map holds the position in
+        original_points of each kept point, see source_points.
+
+        the path must have been validated (see Base.validate_path), i.e., it is closed and has no zero length lines.
+        """
+        points = self.original_points
+        nbr_pts = len(points)
+
+        def step(a: IndexPoint, b: IndexPoint) -> Tuple[int, int]:
+            return (b.x_index > a.x_index) - (b.x_index < a.x_index), (b.y_index > a.y_index) - (b.y_index < a.y_index)
+
+        kept = [
+            i for i, (prev_pt, curr_pt, next_pt) in enumerate(cyclic_n_tuples(points, 3, -1))
+            if step(prev_pt, curr_pt) != step(curr_pt, next_pt) or prev_pt.line_type != curr_pt.line_type
+        ]
+        if kept and kept[0] != 0:
+            # the first point was dropped, start at the beginning of its line (i.e., the last kept point)
+            kept.insert(0, kept.pop())
+        self.point_map = array("l", kept)
+        self.index_points = [points[i] for i in kept] if len(kept) < nbr_pts else list(points)
+
+    def inner_cell(self) -> Tuple[float, float]:
+        """
+        Get the center of a grid cell that lies inside the path: the cell next to the path's first line, on the
+        inside of the path (to the right of the line for a clock wise path, as the y-axis points down).
+
+        :return:    the x, y (column, row) coordinates of the center of the cell, e.g., 0.5, 0.5
+        """
+        (x1, y1), (x2, y2) = self.index_points[0].gxy, self.index_points[1].gxy
+        dx, dy = (x2 > x1) - (x2 < x1), (y2 > y1) - (y2 < y1)
+        nx, ny = (-dy, dx) if self.orientation == "cw" else (dy, -dx)
+        return x1 + (dx + nx) / 2, y1 + (dy + ny) / 2
+
+    def contains(self, x: float, y: float) -> bool:
+        """
+        Check if a point, that is not on any of the lines of the path, lies inside the path.
+
+        :param x:   the x (column) coordinate of the point, e.g., the center of a cell
+        :param y:   the y (row) coordinate of the point
+        :return:    True if the point is inside the path
+
+        counts the vertical lines of the path that a ray going right from the point crosses (even-odd rule).
+        """
+        inside = False
+        for curr_pt, next_pt in cyclic_n_tuples(self.index_points, 2, 0):
+            if curr_pt.x_index == next_pt.x_index > x and min(curr_pt.y_index, next_pt.y_index) < y < max(
+                curr_pt.y_index, next_pt.y_index
+            ):
+                inside = not inside
+        return inside
+
+    def source_points(self, ndx: int) -> List[IndexPoint]:
+        """
+        Get the points, as they were added, that make up the line starting at the given point of the path.
+
+        :param ndx: the position of the point in index_points
+        :return:    the original point at the position and the collinear points dropped after it by compress
+        """
+        if self.point_map is None:
+            return [self.index_points[ndx]]
+        nbr_pts = len(self.original_points)
+        start = self.point_map[ndx]
+        end = self.point_map[(ndx + 1) % len(self.point_map)]
+        return [self.original_points[i % nbr_pts] for i in range(start, end if end > start else end + nbr_pts)]
+
 
 class IndexWall:
     def __init__(self, start_pt: IndexPoint, end_pt: IndexPoint, wall_type: str):
@@ -630,21 +962,31 @@ class IndexWall:
 
 
 class Intersection:
-    def __init__(self, intrxn: Point, x_type: str, x_subtype: str):
+    __slots__ = ("intrxn", "x_type", "x_subtype", "gxy")
+
+    def __init__(self, intrxn: Point, x_type: str, x_subtype: str, gxy: Optional[Tuple[int, int]] = None):
         self.intrxn = intrxn
         self.x_type = x_type
         self.x_subtype = x_subtype
-        self.xpt_sort = (intrxn.x, intrxn.y)
+        # the column & row indices of the intersection, if known
+        self.gxy = gxy
+
+    @property
+    def xpt_sort(self) -> Tuple[float, float]:
+        return self.intrxn.x, self.intrxn.y
 
     def __str__(self):
         return f"{self.x_type} {self.x_subtype} ({self.intrxn.x}, {self.intrxn.y})"
 
 
 class WallSlot:
-    def __init__(self, ws_type):
+    __slots__ = ("type", "_intersections", "sorted")
+
+    def __init__(self, ws_type, is_sorted: bool = False):
         self.type: str = ws_type     # horz or vert
         self._intersections: List[Intersection] = []
-        self.sorted = False
+        # set is_sorted when the intersections will be added in (x, y) order (i.e., by WallSweep)
+        self.sorted = is_sorted
 
     @property
     def intersections(self):
@@ -652,8 +994,15 @@ class WallSlot:
             self._sort()
         return self._intersections
 
-    def add(self, intrxn_pt: Point, x_type: str, x_subtype: str, dim_pt: DimPoint = None):
-        intrxn = Intersection(intrxn_pt, x_type, x_subtype)
+    def add(
+        self,
+        intrxn_pt: Point,
+        x_type: str,
+        x_subtype: str,
+        dim_pt: DimPoint = None,
+        gxy: Optional[Tuple[int, int]] = None,
+    ):
+        intrxn = Intersection(intrxn_pt, x_type, x_subtype, gxy)
         if dim_pt and intrxn.x_type != "corner":
             dim_pt.intersections.append(intrxn)
         self._intersections.append(intrxn)
@@ -664,14 +1013,16 @@ class WallSlot:
 
 
 class Wall:
-    seq = count(1)
-    def __init__(self, pt_1: Point, pt_2: Point, w_type, dim_pt: DimPoint):
+    __slots__ = ("id", "dim_pt", "type", "super_direction", "pt_1", "pt_2", "inter_walL_list")
+
+    def __init__(self, pt_1: Point, pt_2: Point, w_type, dim_pt: DimPoint, wall_id: int = None):
         """
         Define a Wall Object.
 
         :param pt_1:        Point object defining the beginning of the wall
         :param pt_2:        Point object defining the ending of the wall
         :param w_type:      type of wall: finger joint, tab slot
+        :param wall_id:     the id of the wall, assigned from a sequence owned by the Base being built
 
         other attributes:
         - super_direction:  vertical or horizontal
@@ -684,7 +1035,7 @@ class Wall:
             the smaller y coordinate if it is a vertical wall. Swapping pt_1 and pt_2
             if necessary.
         """
-        self.id = next(self.seq)
+        self.id = wall_id
         self.dim_pt = dim_pt
         self.type = w_type
         t1, t2 = pt_1, pt_2
@@ -722,267 +1073,2171 @@ class Wall:
         self is the horizontal wall.
         """
         horz = self
-        horz_y = horz.pt_1.y
         vert = other
-        vert_x = vert.pt_1.x
-        intersection_point = Point(vert_x, horz_y)
-        # cross intersection
-        if vert.pt_1.y < horz_y < vert.pt_2.y and horz.pt_1.x < vert_x < horz.pt_2.x:
-            return "cross", None, intersection_point
-        # corner intersection
-        elif horz.pt_1.x == vert.pt_1.x and horz.pt_1.y == vert.pt_1.y:
-            return "corner", "upper-left", intersection_point
-        elif horz.pt_1.x == vert.pt_2.x and horz.pt_1.y == vert.pt_2.y:
-            return "corner", "lower-left", intersection_point
-        elif horz.pt_2.x == vert.pt_1.x and horz.pt_2.y == vert.pt_1.y:
-            return "corner", "upper-right", intersection_point
-        elif horz.pt_2.x == vert.pt_2.x and horz.pt_2.y == vert.pt_2.y:
-            return "corner", "lower-right", intersection_point
-        # tee intersection
-        elif vert.pt_1.y == horz_y and horz.pt_1.x < vert_x < horz.pt_2.x:
-            return "tee", "top", intersection_point
-        elif vert.pt_2.y == horz_y and horz.pt_1.x < vert_x < horz.pt_2.x:
-            return "tee", "bottom", intersection_point
-        elif horz.pt_1.x == vert_x and vert.pt_1.y < horz_y < vert.pt_2.y:
-            return "tee", "left", intersection_point
-        elif horz.pt_2.x == vert_x and vert.pt_1.y < horz_y < vert.pt_2.y:
-            return "tee", "right", intersection_point
-        # walls do not intersect
-        else:
+        x_type, x_subtype = junction(horz.pt_1.x, horz.pt_2.x, horz.pt_1.y, vert.pt_1.x, vert.pt_1.y, vert.pt_2.y)
+        # only create the intersection point if the walls intersect
+        if x_type is None:
             return None, None, None
+        return x_type, x_subtype, Point(vert.pt_1.x, horz.pt_1.y)
 
 
-class Base:
+class WallSweep:
     """
-    The Base class represents the dimensions of the base of the tray. It uses a path of points to
-    describe the polygon shape will form the base of the tray.
+    A sweep line over the x-axis that finds the intersections between a list of horizontal walls and a list of
+    vertical walls, without testing every horizontal wall against every vertical wall.
+
+    each horizontal wall produces a start event (at its smaller x) and an end event (at its larger x), each vertical
+    wall produces a single event (at its x). The events are processed in x order while keeping the horizontal
+    walls that span the current x in a list sorted by y (the active list). At a vertical wall's event, only the
+    active horizontal walls with a y between the vertical wall's smaller and larger y can touch it, and those are
+    found by bisecting the active list.
+
+    at the same x, horizontal walls are started before and ended after the vertical walls, so that corner and tee
+    intersections at the ends of the horizontal walls are found.
+
+    the intersections are generated in (x, y) order, i.e., already sorted for both the horizontal and the vertical
+    WallSlot objects that they are added to.
     """
-    # direction_dims is a dictionary used to look up the outer, inner tuple pair for a given
-    #   combination of path orientation, prev_direction and current direction
-    direction_dims: Dict[str, Dict[str, Dict[str, Tuple[int, int]]]] = {
-        "cw": {
-            "left": {"left": (7, 2), "up": (6, 3), "down": (8, 1)},
-            "right": {"right": (2, 7), "up": (1, 8), "down": (3, 6)},
-            "up": {"left": (6, 3), "right": (1, 8), "up": (4, 5)},
-            "down": {"left": (8, 1), "right": (3, 6), "down": (5, 4)},
-        },
-        "ccw": {
-            "left": {"left": (2, 7), "up": (3, 6), "down": (1, 8)},
-            "right": {"right": (7, 2), "up": (8, 1), "down": (6, 3)},
-            "up": {"left": (3, 6), "right": (8, 1), "up": (5, 4)},
-            "down": {"left": (1, 8), "right": (6, 3), "down": (4, 5)},
-        },
-    }
+    # event kinds - the numeric value determines the processing order of events having the same x coordinate
+    h_start, vert, h_end = 0, 1, 2
 
-    def __init__(
-        self,
-        mat_thick: float,
-        fngr_len: float,
-        spc_len: float,
-        min_be_len: float,
-        col_widths: List[float],
-        row_heights: List[float],
-        max_tbslt_bt_xs: int,
-        min_tbslt_len: int,
-        wall_tbslt_dist: float,
-        depth: float,
-        on_center: bool = False
-    ):
-        """
-        Create a Base object
+    def __init__(self, walls_horz: List[Wall], walls_vert: List[Wall]):
+        self.walls_horz = walls_horz
+        self.walls_vert = walls_vert
 
-        :param mat_thick:       material thickness
-        :param fngr_len:        finger length - the width of a finger joint
-        :param spc_len:         space length - the width of a space within a finger joint
-        :param min_be_len:      minimum beginning / ending length - the minimal width of the space that come before
-                                and after the finger/space joint
-        :param col_widths:      list of column widths to use to calculate the base dimensions (aggregate points)
-        :param row_heights:     list of row heights to use to calculate the base dimensions (aggregate points)
-        :param depth:           how high the walls are...
+    def intersections(self) -> Iterator[Tuple[int, int, str, Optional[str], Point]]:
         """
-        self.max_tbslt_bt_xs = max_tbslt_bt_xs
-        self.min_tbslt_len = min_tbslt_len
-        self.wall_tbslt_dist = wall_tbslt_dist
+        Generate the intersections of the horizontal and vertical walls in (x, y) order.
 
-        self.index_paths: List[IndexPath] = []
-        self.dim_paths: List[DimPath] = []
+        :return:    an iterator of tuples of: horz wall index, vert wall index, intersection type,
+                    intersection subtype & intersection point
+        """
+        events = []
+        for h_ndx, wall_h in enumerate(self.walls_horz):
+            events.append((wall_h.pt_1.x, self.h_start, h_ndx))
+            events.append((wall_h.pt_2.x, self.h_end, h_ndx))
+        for v_ndx, wall_v in enumerate(self.walls_vert):
+            events.append((wall_v.pt_1.x, self.vert, v_ndx))
+        events.sort()
+
+        # active holds (y, horz wall index) tuples of the horizontal walls spanning the current x, sorted by y
+        active: List[Tuple[float, int]] = []
+        nbr_horz = len(self.walls_horz)
+        for _, kind, ndx in events:
+            if kind == self.h_start:
+                insort(active, (self.walls_horz[ndx].pt_1.y, ndx))
+            elif kind == self.h_end:
+                del active[bisect_left(active, (self.walls_horz[ndx].pt_1.y, ndx))]
+            else:
+                wall_v = self.walls_vert[ndx]
+                vert_x, vert_y1, vert_y2 = wall_v.pt_1.x, wall_v.pt_1.y, wall_v.pt_2.y
+                lo = bisect_left(active, (vert_y1, -1))
+                hi = bisect_right(active, (vert_y2, nbr_horz))
+                for horz_y, h_ndx in active[lo:hi]:
+                    wall_h = self.walls_horz[h_ndx]
+                    x_type, x_subtype = junction(wall_h.pt_1.x, wall_h.pt_2.x, horz_y, vert_x, vert_y1, vert_y2)
+                    if x_type:
+                        yield h_ndx, ndx, x_type, x_subtype, Point(vert_x, horz_y)
+
+
+class WallLattice:
+    """
+    The WallLattice class classifies the wall junctions in index space (i.e., on the column / row lattice) instead
+    of comparing the x, y coordinates of every pair of walls.
 
-        self.norm_index_paths: List[IndexPath] = []
-        self.norm_dim_paths: List[DimPath] = []
+    each wall is rasterized onto the lattice by marking the unit edges that it covers:
+        - horz: one entry per horizontal unit edge (x, y) - (x + 1, y), stored at y * nbr_cols + x
+        - vert: one entry per vertical unit edge (x, y) - (x, y + 1), stored at x * nbr_rows + y
 
-        self.index_walls: List[IndexWall] = []
-        self.base_slots: List[WallSlot] = []
-        self.exterior_walls: List[WallSlot] = []
+    every lattice node then gets a 4 bit mask of its covered neighbouring edges (left, right, up & down) which
+    is used to look up the junction type & subtype of the node. The junction types and subtypes are the same as
+    the ones returned by Wall.intersect, for example a node with a wall to its right & a wall below it is an
+    upper-left corner and a node with walls to its left, right & below it is a top tee.
 
-        self.mat_thick = mat_thick
-        self.fngr_len = fngr_len
-        self.spc_len = spc_len
-        self.min_be_len = min_be_len
-        self.depth_outer = depth
+    nodes with less than 2 covered edges or with only a left & right (or only an up & down) edge are not junctions.
 
-        self.on_center = on_center
-        self.col_widths = col_widths
-        self.nbr_cols = len(self.col_widths)
-        self.width = sum(self.col_widths) + self.mat_thick if self.on_center else 0
+    note: a node is classified as a whole, so where a wall ends against a collinear wall (e.g., an interior wall
+    that continues an exterior wall) the node is a tee, while Wall.intersect would report a corner for one pair.
+    """
+    # neighbouring edge bits of a lattice node
+    left, right, up, down = 1, 2, 4, 8
+
+    # junctions is a tuple used to look up the (junction type, junction subtype) for a given neighbour mask
+    #   mask bits: 1 = left, 2 = right, 4 = up, 8 = down
+    junctions: Tuple[Tuple[Optional[str], Optional[str]], ...] = (
+        (None, None),               # 0:
+        (None, None),               # 1:  left
+        (None, None),               # 2:  right
+        (None, None),               # 3:  left right
+        (None, None),               # 4:  up
+        ("corner", "lower-right"),  # 5:  left up
+        ("corner", "lower-left"),   # 6:  right up
+        ("tee", "bottom"),          # 7:  left right up
+        (None, None),               # 8:  down
+        ("corner", "upper-right"),  # 9:  left down
+        ("corner", "upper-left"),   # 10: right down
+        ("tee", "top"),             # 11: left right down
+        (None, None),               # 12: up down
+        ("tee", "right"),           # 13: left up down
+        ("tee", "left"),            # 14: right up down
+        ("cross", None),            # 15: left right up down
+    )
+
+    def __init__(self, nbr_cols: int, nbr_rows: int):
+        self.nbr_cols = nbr_cols
+        self.nbr_rows = nbr_rows
+        self.horz = bytearray(nbr_cols * (nbr_rows + 1))
+        self.vert = bytearray((nbr_cols + 1) * nbr_rows)
+        self.masks: Optional[bytearray] = None
+
+    def add(self, start: Tuple[int, int], end: Tuple[int, int]) -> str:
+        """
+        Rasterize a wall onto the lattice.
 
-        self.row_heights = row_heights
-        self.nbr_rows = len(self.row_heights)
-        self.height = sum(self.row_heights) + self.mat_thick if self.on_center else 0
+        :param start:   the x, y indices of one end of the wall
+        :param end:     the x, y indices of the other end of the wall
+        :return:        the super direction of the wall: horz or vert
+        """
+        (x1, y1), (x2, y2) = start, end
+        if y1 == y2:
+            x1, x2 = min(x1, x2), max(x1, x2)
+            self.horz[y1 * self.nbr_cols + x1:y1 * self.nbr_cols + x2] = b"\x01" * (x2 - x1)
+            return "horz"
+        elif x1 == x2:
+            y1, y2 = min(y1, y2), max(y1, y2)
+            self.vert[x1 * self.nbr_rows + y1:x1 * self.nbr_rows + y2] = b"\x01" * (y2 - y1)
+            return "vert"
+        else:
+            raise ValueError(f"the wall must be horizontal or vertical - given indices {start} and {end}.")
 
-        self.agg_coords: List[List[AggregatePoint]] = []
+    def classify(self) -> None:
+        """
+        Calculate the neighbour mask of every lattice node, call after all the walls have been added.
+        """
+        nbr_cols, nbr_rows = self.nbr_cols, self.nbr_rows
+        horz, vert = self.horz, self.vert
+        masks = bytearray((nbr_cols + 1) * (nbr_rows + 1))
+        for x in range(nbr_cols + 1):
+            for y in range(nbr_rows + 1):
+                mask = 0
+                if x > 0 and horz[y * nbr_cols + x - 1]:
+                    mask |= self.left
+                if x < nbr_cols and horz[y * nbr_cols + x]:
+                    mask |= self.right
+                if y > 0 and vert[x * nbr_rows + y - 1]:
+                    mask |= self.up
+                if y < nbr_rows and vert[x * nbr_rows + y]:
+                    mask |= self.down
+                masks[x * (nbr_rows + 1) + y] = mask
+        self.masks = masks
+
+    def junction(self, x: int, y: int) -> Tuple[Optional[str], Optional[str]]:
+        return self.junctions[self.masks[x * (self.nbr_rows + 1) + y]]
 
-        # self.calc_coords()
+    @staticmethod
+    def nodes(start: Tuple[int, int], end: Tuple[int, int]) -> Iterator[Tuple[int, int]]:
+        """
+        Generate the lattice nodes of a wall (including its ends), in order of increasing x (horz walls) or y (vert
+        walls).
+        """
+        (x1, y1), (x2, y2) = start, end
+        if y1 == y2:
+            return ((x, y1) for x in range(min(x1, x2), max(x1, x2) + 1))
+        return ((x1, y) for y in range(min(y1, y2), max(y1, y2) + 1))
+
+    def wall_junctions(
+        self, start: Tuple[int, int], end: Tuple[int, int]
+    ) -> Iterator[Tuple[int, int, str, Optional[str]]]:
+        """
+        Generate the junctions along a wall, in order of increasing x (horz walls) or y (vert walls).
 
-    def get_avg_agg_point(self, index_point: IndexPoint) -> Point:
+        :param start:   the x, y indices of one end of the wall
+        :param end:     the x, y indices of the other end of the wall
+        :return:        an iterator of tuples of: x index, y index, junction type & junction subtype
         """
-        Returns the AVG point from the AggregatePoint corresponding to the specified IndexPoint
+        for x, y in self.nodes(start, end):
+            x_type, x_subtype = self.junction(x, y)
+            if x_type:
+                yield x, y, x_type, x_subtype
 
-        :param index_point:     the index point to get the AVG aggregate x,y coordinate values
-        :return:                the Point object for the AVG coordinate of the AggregatePoint
 
-        IndexPoint objects represent the column (x) and row (y) position within the 2D AggregatePoint grid
+class SpatialIndex:
+    """
+    A uniform grid of square buckets over the x, y plane, used to find the items (e.g., wall slots) near a position
+    without testing every item.
+
+    each item is added with its bounding box and is listed in every bucket that the box overlaps. A position (or a
+    rectangle) is then only tested against the boxes of the items listed in the buckets it overlaps, so a query
+    takes constant time when the items are spread out over the plane.
+    """
+    def __init__(self, cell_size: float):
+        """
+        :param cell_size:   the width & height of the buckets (in the unit of the coordinates)
         """
-        return self.agg_coords[index_point.x_index][index_point.y_index].avg()
+        if cell_size <= 0:
+            raise ValueError(f"the cell size must be greater than 0: {cell_size}")
+        self.cell_size = cell_size
+        self.items: list = []
+        # 4 values (x1, y1, x2, y2) per item
+        self.boxes = array("d")
+        self.buckets: Dict[Tuple[int, int], List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _bucket_range(self, x1: float, y1: float, x2: float, y2: float) -> Iterator[Tuple[int, int]]:
+        size = self.cell_size
+        for i in range(int(x1 // size), int(x2 // size) + 1):
+            for j in range(int(y1 // size), int(y2 // size) + 1):
+                yield i, j
+
+    def add(self, item, x1: float, y1: float, x2: float, y2: float) -> None:
+        """
+        Add an item with the bounding box x1, y1 - x2, y2 (x1 <= x2 and y1 <= y2).
+        """
+        ndx = len(self.items)
+        self.items.append(item)
+        self.boxes.extend((x1, y1, x2, y2))
+        for bucket in self._bucket_range(x1, y1, x2, y2):
+            self.buckets.setdefault(bucket, []).append(ndx)
 
-    def get_dims_from_agg_points(
-        self, index_point: IndexPoint, outside: int, inside: int
-    ) -> Tuple[Point, Point]:
+    def query_rect(self, x1: float, y1: float, x2: float, y2: float) -> list:
         """
-        Returns the inside and outside dimensions (x, y coords) points for a given index point and point numbers.
+        Get the items whose bounding box overlaps (or touches) the rectangle x1, y1 - x2, y2, in the order they
+        were added.
+        """
+        boxes = self.boxes
+        found = set()
+        for bucket in self._bucket_range(x1, y1, x2, y2):
+            for ndx in self.buckets.get(bucket, ()):
+                if ndx not in found:
+                    b_x1, b_y1, b_x2, b_y2 = boxes[4 * ndx:4 * ndx + 4]
+                    if b_x1 <= x2 and x1 <= b_x2 and b_y1 <= y2 and y1 <= b_y2:
+                        found.add(ndx)
+        return [self.items[ndx] for ndx in sorted(found)]
+
+    def hit_test(self, x: float, y: float, tolerance: float = 0.0) -> list:
+        """
+        Get the items whose bounding box is within the tolerance of the position x, y, in the order they were added.
+        """
+        return self.query_rect(x - tolerance, y - tolerance, x + tolerance, y + tolerance)
 
-        :param index_point:     index point corresponding to the aggregate point you wish to get the
-                                inside and outside dimensional points for
-        :param outside:         point number to get for the outside dimensional point
-        :param inside:          point number to get for the inside dimensional point
-        :return:                the x, y coordinates (outside, inside) corresponding to the point numbers specified
 
-        the agg_pt.get() method takes a point number and returns real point object based on that as follows
-            pt nbr 1:       x_min, y_min
-            pt nbr 2:       x_avg, y_min
-            pt nbr 3:       x_max, y_max
-            pt nbr 4:       x_min, y_avg
-            pt nbr 5:       x_max, y_avg
-            pt nbr 6:       x_min, y_max
-            pt nbr 7:       x_avg, y_max
-            pt nbr 8:       x_max, y_max
-        """
-        # get the aggregate point corresponding to the index point passed in
-        agg_pt = self.agg_coords[index_point.x_index][index_point.y_index]
+class Compartment:
+    """
+    The Compartment class describes one compartment of a tray, i.e., a group of grid cells that are not separated by
+    walls (see Base.get_compartments).
+
+    attributes:
+        - id:       sequential number of the compartment (1, 2, ...), in the order of their top left cell
+        - cells:    the (column, row) of the cells of the compartment
+        - boxes:    4 values per cell (x1, y1, x2, y2): the inside of the cell, i.e., its on-center rectangle minus
+                    the walls around it (in the unit of the base)
+        - width:    the inside width (x) of the compartment, for compartments that are not rectangular the width of
+                    their bounding box
+        - length:   the inside length (y) of the compartment, see width
+        - area:     the inside area of the compartment (the area of the base between the walls)
+        - volume:   the inside volume of the compartment: the area times the depth of the tray (depth_outer)
+
+    width & length are in millimetres, area in square millimetres and volume in cubic millimetres.
+    """
+    __slots__ = ("id", "cells", "boxes", "width", "length", "area", "volume")
 
-        # get the outside & inside dimensional coordinates based on the point numbers (1 - 4) passed in
-        outside_pt = agg_pt.get(outside)
-        inside_pt = agg_pt.get(inside)
+    def __init__(self, comp_id: int):
+        self.id = comp_id
+        self.cells: List[Tuple[int, int]] = []
+        self.boxes = array("d")
+        self.width = 0.0
+        self.length = 0.0
+        self.area = 0.0
+        self.volume = 0.0
 
-        return outside_pt, inside_pt
+    def __str__(self):
+        return (
+            f"COMPARTMENT #{self.id} - {len(self.cells)} cells, {self.width} x {self.length}, area: {self.area}, "
+            f"volume: {self.volume}"
+        )
 
-    def calc_agg_coords_oc(self):
-        col_offset = 0
-        col_offsets = [col_offset]
-        for col_width in self.col_widths:
-            col_offset += col_width
-            col_offsets.append(col_offset)
-
-        row_offset = 0
-        row_offsets = [row_offset]
-        for row_height in self.row_heights:
-            row_offset += row_height
-            row_offsets.append(row_offset)
-
-        for col in col_offsets:
-            x_min = col
-            x_max = col + self.mat_thick
-            x_avg = (x_min + x_max) / 2.0
-            row_of_agg_points = []
-            for row in row_offsets:
-                y_min = row
-                y_max = row + self.mat_thick
-                y_avg = (y_min + y_max) / 2.0
-                row_of_agg_points.append(
-                    AggregatePoint(x_min, y_min, x_avg, y_avg, x_max, y_max)
-                )
-            self.agg_coords.append(row_of_agg_points)
 
-    def calc_agg_coords(self):
-        # calc the ratio to adjust the column widths by
-        #   total_mat_thickness = (nbr_of_cols + 1) * mat_thick
-        #   total_inside_dim_cols_widths = total_of_all_columns - total_mat_thickness
-        #   ratio = total_inside_dim_cols_widths / total_of_all_columns
-        col_ratio = (self.width - ((self.nbr_cols + 1) * self.mat_thick)) / self.width
+class TableCompiler:
+    """
+    The TableCompiler class compiles the cell layouts of main2 (Table2 rows of ColCell spans or Table rows of Cell
+    wall flags) into the paths & walls of a Base (see Base.from_table).
+
+    the cells of the table are rasterized onto the column / row lattice:
+        - floor:    one entry per cell (x, y), stored at y * nbr_cols + x, set if the cell is part of the base
+        - horz:     one entry per horizontal unit edge (x, y) - (x + 1, y), stored at y * nbr_cols + x, set if a
+                    wall separates the cells above and below the edge
+        - vert:     one entry per vertical unit edge (x, y) - (x, y + 1), stored at x * nbr_rows + y, set if a
+                    wall separates the cells left and right of the edge
+
+    the paths are traced along the unit edges between floor and non-floor cells and the interior walls are the
+    runs of consecutive set edges along each column / row line, so both take linear time in the number of cells.
+    """
 
-        # calc adjusted columns (i.e., inside dim width)
-        col_id_widths = [col * col_ratio for col in self.col_widths]
+    # the direction of travel (dx, dy) along a unit edge, for each of the 4 sides of a floor cell, so the cells are
+    #   on the right of the traced paths (clock wise around the islands & counter clock wise around the holes)
+    right_turns = {(1, 0): (0, 1), (0, 1): (-1, 0), (-1, 0): (0, -1), (0, -1): (1, 0)}
 
-        # calc the column offsets by accumulating
-        #   the adj col widths
-        #   plus the mat_thickness
-        col_offset = 0
-        col_offsets = [col_offset]
-        for col_id_width in col_id_widths:
-            col_offset += col_id_width + self.mat_thick
-            col_offsets.append(col_offset)
-
-        # do the same for the rows...
-
-        row_ratio = (self.height - ((self.nbr_rows + 1) * self.mat_thick)) / self.height
-        row_id_heights = [row * row_ratio for row in self.row_heights]
-        row_offset = 0
-        row_offsets = [row_offset]
-        for row_id_height in row_id_heights:
-            row_offset += row_id_height + self.mat_thick
-            row_offsets.append(row_offset)
-
-        for col in col_offsets:
-            x_min = col
-            x_max = col + self.mat_thick
-            x_avg = (x_min + x_max) / 2.0
-            row_of_agg_points = []
-            for row in row_offsets:
-                y_min = row
-                y_max = row + self.mat_thick
-                y_avg = (y_min + y_max) / 2.0
-                row_of_agg_points.append(
-                    AggregatePoint(x_min, y_min, x_avg, y_avg, x_max, y_max)
-                )
-            self.agg_coords.append(row_of_agg_points)
+    def __init__(self, nbr_cols: int, nbr_rows: int):
+        self.nbr_cols = nbr_cols
+        self.nbr_rows = nbr_rows
+        self.floor = bytearray(nbr_cols * nbr_rows)
+        self.horz = bytearray(nbr_cols * (nbr_rows + 1))
+        self.vert = bytearray((nbr_cols + 1) * nbr_rows)
 
-    def calc_dim_paths(self):
-        # TODO: !!! see if we could refactor the bulk of the functionality (i.e., the code in the for loop)
-        #   in this method into the DimPath add() method. This would allow the add method to be more independent
-        #   and more usable by other functions (if necessary). That is if we needed to create DimPath objects from
-        #   other lists than just the list used to hold the BASE object's points.
-        for i_path in self.index_paths:
+    @classmethod
+    def from_table2(cls, table) -> TableCompiler:
+        """
+        Rasterize a main2 Table2 (rows of ColCell objects).
 
-            # determine the orientation for the path by using the first 3 points of the path
-            path_ori = i_path.orientation
+        :param table:   the Table2 object
+        :return:        the TableCompiler object
 
-            # loop over each point in the path with its corresponding prev and next points
-            dim_path = DimPath(path_ori)
-            for prev_i_point, curr_i_point, next_i_point in cyclic_n_tuples(i_path.index_points, 3, -1):
+        as in an HTML table, the ColCell objects of a row fill the columns from left to right, skipping the columns
+        taken by the cells spanning down from the rows above. Walls are placed between the cells of different
+        ColCell objects, all the cells must be covered by exactly one ColCell object.
+        """
+        nbr_cols, nbr_rows = table.nbr_cols, table.nbr_rows
+        compiler = cls(nbr_cols, nbr_rows)
+        owners = array("l", [0]) * (nbr_cols * nbr_rows)
+        owner = 0
+        for y, row in enumerate(table.rows):
+            x = 0
+            for col_cell in row.col_cells:
+                while x < nbr_cols and owners[y * nbr_cols + x]:
+                    x += 1
+                if x + col_cell.col_span > nbr_cols or y + col_cell.row_span > nbr_rows:
+                    raise ValueError(
+                        f"cell #{owner + 1} ({col_cell.col_span} x {col_cell.row_span} at column {x}, row {y}) "
+                        f"does not fit in the {nbr_cols} x {nbr_rows} grid"
+                    )
+                owner += 1
+                for cy in range(y, y + col_cell.row_span):
+                    for cx in range(x, x + col_cell.col_span):
+                        if owners[cy * nbr_cols + cx]:
+                            raise ValueError(
+                                f"cell #{owner} ({col_cell.col_span} x {col_cell.row_span} at column {x}, row {y}) "
+                                f"overlaps cell #{owners[cy * nbr_cols + cx]}"
+                            )
+                        owners[cy * nbr_cols + cx] = owner
+                x += col_cell.col_span
+        if 0 in owners:
+            ndx = owners.index(0)
+            raise ValueError(f"the cell at column {ndx % nbr_cols}, row {ndx // nbr_cols} is not covered")
+
+        compiler.floor[:] = b"\x01" * (nbr_cols * nbr_rows)
+        for y in range(nbr_rows):
+            for x in range(nbr_cols):
+                ndx = y * nbr_cols + x
+                if x > 0 and owners[ndx - 1] != owners[ndx]:
+                    compiler.vert[x * nbr_rows + y] = 1
+                if y > 0 and owners[ndx - nbr_cols] != owners[ndx]:
+                    compiler.horz[ndx] = 1
+        return compiler
 
-                # get the avg aggregate (on center) point for the p, c & n ndx pts
-                prev_pt = self.get_avg_agg_point(prev_i_point)
-                curr_pt = self.get_avg_agg_point(curr_i_point)
-                next_pt = self.get_avg_agg_point(next_i_point)
+    @classmethod
+    def from_cells(cls, table) -> TableCompiler:
+        """
+        Rasterize a main2 Table (rows of Cell objects).
 
-                # generate the previous and current lines from the p, c & n ndx pts
-                prev_ln = Line(prev_pt, curr_pt)
-                curr_ln = Line(curr_pt, next_pt)
+        :param table:   the Table object
+        :return:        the TableCompiler object
 
-                # get the line directions (going left, right, up or down)
-                prev_dire = prev_ln.direction()
-                curr_dire = curr_ln.direction()
+        the cells with floor=False are not part of the base. A wall separates 2 neighbouring floor cells if either
+        of them has the wall on their shared side (e.g., the left flag of a cell or the right flag of the cell to
+        its left). The walls along the outline of the base are created from the paths, so the flags of the sides
+        facing a non-floor cell (or the outside of the grid) are ignored.
+        """
+        nbr_cols, nbr_rows = table.nbr_cols, table.nbr_rows
+        if len(table.cells) != nbr_rows or any(len(row) != nbr_cols for row in table.cells):
+            raise ValueError(f"the table must have {nbr_rows} rows of {nbr_cols} cells")
+        compiler = cls(nbr_cols, nbr_rows)
+        floor = compiler.floor
+        for y, row in enumerate(table.cells):
+            for x, cell in enumerate(row):
+                floor[y * nbr_cols + x] = bool(cell.floor)
+        for y, row in enumerate(table.cells):
+            for x, cell in enumerate(row):
+                ndx = y * nbr_cols + x
+                if not floor[ndx]:
+                    continue
+                if x > 0 and floor[ndx - 1] and (cell.left or row[x - 1].right):
+                    compiler.vert[x * nbr_rows + y] = 1
+                if y > 0 and floor[ndx - nbr_cols] and (cell.top or table.cells[y - 1][x].bottom):
+                    compiler.horz[ndx] = 1
+        return compiler
+
+    def paths(self) -> List[List[Tuple[int, int]]]:
+        """
+        Trace the outlines of the floor cells.
 
-                # determine outside & inside dimensional points based on the:
-                #   previous line direction
-                #   current line direction
-                #   and path orientation
-                outside_pt_nbr, inside_pt_nbr = Base.dim(prev_dire, curr_dire, path_ori)
-                outside_dim, inside_dim = self.get_dims_from_agg_points(
-                    curr_i_point, outside_pt_nbr, inside_pt_nbr
-                )
-                new_dim_point = dim_path.add(
-                    direction=curr_dire,
-                    line_type=curr_i_point.line_type,
+        :return:    the paths (one per island & hole), each a list of the x, y indices of its corners
+
+        where 2 islands (or holes) touch at a node, the outlines take the right turn at the node, so they stay
+        apart instead of forming a path that crosses itself.
+        """
+        nbr_cols, nbr_rows, floor = self.nbr_cols, self.nbr_rows, self.floor
+
+        def is_floor(x: int, y: int) -> bool:
+            return 0 <= x < nbr_cols and 0 <= y < nbr_rows and floor[y * nbr_cols + x] == 1
+
+        # the outgoing boundary edges of each node (in the order they are found, so the paths are deterministic)
+        edges: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        for y in range(nbr_rows + 1):
+            for x in range(nbr_cols + 1):
+                if x < nbr_cols and is_floor(x, y) != is_floor(x, y - 1):
+                    if is_floor(x, y):
+                        edges.setdefault((x, y), []).append((1, 0))
+                    else:
+                        edges.setdefault((x + 1, y), []).append((-1, 0))
+                if y < nbr_rows and is_floor(x - 1, y) != is_floor(x, y):
+                    if is_floor(x - 1, y):
+                        edges.setdefault((x, y), []).append((0, 1))
+                    else:
+                        edges.setdefault((x, y + 1), []).append((0, -1))
+
+        paths = []
+        for start in list(edges):
+            while edges[start]:
+                node, direction = start, edges[start].pop(0)
+                first_direction = direction
+                corners = []
+                while True:
+                    node = (node[0] + direction[0], node[1] + direction[1])
+                    # the path is closed with the edge it started with, once the turn at the start node leads to it
+                    out_edges = edges[node] + [first_direction] if node == start else edges[node]
+                    turn = self.right_turns[direction]
+                    next_direction = turn if turn in out_edges else out_edges[0]
+                    if next_direction != direction:
+                        corners.append(node)
+                    if node == start and next_direction == first_direction:
+                        break
+                    edges[node].remove(next_direction)
+                    direction = next_direction
+                paths.append(corners)
+        return paths
+
+    def walls(self) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """
+        Merge the wall edges into walls.
+
+        :return:    the walls, as (start, end) pairs of x, y indices
+
+        each run of consecutive wall edges along a column / row line becomes a single wall, which is the smallest
+        set of straight walls covering the edges (the horizontal & vertical walls cross at their intersections).
+        """
+        nbr_cols, nbr_rows = self.nbr_cols, self.nbr_rows
+        walls = []
+        for edge_set, nbr_lines, line_len, horizontal in (
+            (self.horz, nbr_rows + 1, nbr_cols, True),
+            (self.vert, nbr_cols + 1, nbr_rows, False),
+        ):
+            for line in range(nbr_lines):
+                run_start = None
+                offset = line * line_len
+                for n in range(line_len + 1):
+                    if n < line_len and edge_set[offset + n]:
+                        if run_start is None:
+                            run_start = n
+                    elif run_start is not None:
+                        if horizontal:
+                            walls.append(((run_start, line), (n, line)))
+                        else:
+                            walls.append(((line, run_start), (line, n)))
+                        run_start = None
+        return walls
+
+
+@dataclass(frozen=True)
+class JointSpec:
+    """
+    The JointSpec class holds the parameters of the finger joints and the tab / slot joints.
+
+    these parameters are only used when rendering the parts (see the gen_svg_* methods of the Base class) and not
+    when calculating the layout, so the same layout can be rendered with different joint parameters
+    (see Base.freeze_layout & Base.from_layout).
+
+    see the Base class for a description of each parameter.
+    """
+    fngr_len: float
+    spc_len: float
+    min_be_len: float
+    max_tbslt_bt_xs: int
+    min_tbslt_len: int
+    wall_tbslt_dist: float
+
+
+class JointPlan:
+    """
+    The JointPlan class is a lookup table of the joint plans of a base, keyed by length:
+        - fingers:  the number of fingers & spaces and the beginning / ending length of a finger joint edge of a
+                    given (outside) length, see Base.calc_min
+        - tabs:     the length & number of the tabs / slots of a span of a given (on center) length between 2
+                    intersections, see Base.calc_tbslt_len
+
+    the plans only depend on the length, the material thickness and the joint parameters, which do not change for
+    a given base, so the table is shared by all the generators of the base and never goes stale: the plans of the
+    distinct lengths of the base are computed up front (see Base.get_joint_plan) and the plans of any other
+    length the first time they are looked up.
+    """
+    def __init__(self, mat_thick: float, joints: JointSpec, fixed_point: bool):
+        self.mat_thick = mat_thick
+        self.joints = joints
+        self.fixed_point = fixed_point
+        self.finger_plans: Dict[float, Tuple[int, int, float]] = {}
+        self.tab_plans: Dict[float, Tuple[float, int]] = {}
+
+    def div(self, value: float, n: int) -> float:
+        return value // n if self.fixed_point else value / n
+
+    def add(self, edge_lens: Iterable[float], span_lens: Iterable[float]) -> None:
+        """
+        Compute the plans of the distinct lengths that are not in the table yet.
+
+        :param edge_lens:   the (outside) lengths of finger joint edges
+        :param span_lens:   the (on center) lengths of spans between intersections
+        """
+        j = self.joints
+        # fingers: the number of finger / space pairs that fit in the edge, after the material thickness & minimum
+        #   beginning / ending length at both ends, plus the last finger
+        pitch = j.fngr_len + j.spc_len
+        ends = (self.mat_thick + j.min_be_len) * 2
+        for tot_len in set(edge_lens).difference(self.finger_plans):
+            max_fs = tot_len - ends
+            nbr_of_fngrs = int((max_fs + j.spc_len) // pitch)
+            be_len = j.min_be_len + self.div(max_fs - nbr_of_fngrs * j.fngr_len - (nbr_of_fngrs - 1) * j.spc_len, 2)
+            self.finger_plans[tot_len] = (nbr_of_fngrs, nbr_of_fngrs - 1, be_len)
+
+        # tabs: the largest number of tabs n (up to max_tbslt_bt_xs) for which the tabs are at least min_tbslt_len
+        #   long: (span_len - n * tot_spc_len) / n >= min_tbslt_len, i.e., n <= span_len / (tot_spc_len +
+        #   min_tbslt_len), or 1 tab if even a single tab is too short
+        tot_spc_len = (2 * j.wall_tbslt_dist) + self.mat_thick
+        unit_len = tot_spc_len + j.min_tbslt_len
+        for span_len in set(span_lens).difference(self.tab_plans):
+            if j.max_tbslt_bt_xs < 1:
+                self.tab_plans[span_len] = (-1, -1)
+                continue
+            n = min(j.max_tbslt_bt_xs, max(int(span_len // unit_len) if unit_len > 0 else j.max_tbslt_bt_xs, 1))
+            # guard against the rounding of the division, the plan must satisfy the same test as the search did
+            while n > 1 and self.div(span_len - n * tot_spc_len, n) < j.min_tbslt_len:
+                n -= 1
+            while n < j.max_tbslt_bt_xs and self.div(span_len - (n + 1) * tot_spc_len, n + 1) >= j.min_tbslt_len:
+                n += 1
+            self.tab_plans[span_len] = (self.div(span_len - n * tot_spc_len, n), n)
+
+    def fingers(self, tot_len: float) -> Tuple[int, int, float]:
+        plan = self.finger_plans.get(tot_len)
+        if plan is None:
+            self.add((tot_len,), ())
+            plan = self.finger_plans[tot_len]
+        return plan
+
+    def tabs(self, span_len: float) -> Tuple[float, int]:
+        plan = self.tab_plans.get(span_len)
+        if plan is None:
+            self.add((), (span_len,))
+            plan = self.tab_plans[span_len]
+        return plan
+
+
+@dataclass(frozen=True)
+class Layout:
+    """
+    The Layout class holds the computed layout of a Base, i.e., the results of all the stages of the Base class.
+
+    the layout only depends on the material thickness, the column widths & row heights, the path, the walls and the
+    wall junction classifier (lattice_walls). It is created by Base.freeze_layout and can be rendered with any number
+    of JointSpec objects by calling Base.from_layout, without repeating the layout calculations.
+    """
+    mat_thick: float
+    depth_outer: float
+    on_center: bool
+    col_widths: Tuple[float, ...]
+    row_heights: Tuple[float, ...]
+    nbr_cols: int
+    nbr_rows: int
+    width: float
+    height: float
+    agg_coords: AggregateGrid
+    col_offsets: array
+    row_offsets: array
+    agg_oc: bool
+    index_paths: Tuple[IndexPath, ...]
+    dim_paths: Tuple[DimPath, ...]
+    norm_index_paths: Tuple[IndexPath, ...]
+    norm_dim_paths: Tuple[DimPath, ...]
+    index_walls: Tuple[IndexWall, ...]
+    path_index_walls: Tuple[IndexWall, ...]
+    base_slots: Tuple[WallSlot, ...]
+    exterior_walls: Tuple[WallSlot, ...]
+    fixed_point: bool
+    lattice_walls: bool
+
+
+class SnapshotWriter:
+    """
+    The SnapshotWriter class collects the flat arrays of a Base snapshot and encodes them as bytes.
+
+    the snapshot is a sequence of sections, each section is a typed array (int32, int64 or float64) written as:
+    its type code (1 byte), its number of items (4 bytes) and the items themselves, all in little endian byte order.
+
+    strings (directions, corner sides, line types, intersection types, ...) are stored as integer codes into a
+    string table that is written, after the header, as the first section (utf-8, null separated). The code 0 is
+    reserved for None.
+
+    the lengths & coordinates of a float base can be ints or floats (e.g., an integer column width or grid line), so
+    each section of numbers is followed by a section (uint8) that flags the ints, see add_numbers. The numbers are
+    restored with their type and the restored base renders the same SVG text.
+    """
+    magic = b"TRAY"
+    version = 2
+    header = struct.Struct("<4sBI")
+    section = struct.Struct("<cI")
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self.codes: Dict[Optional[str], int] = {None: 0}
+        self.sections: List[array] = []
+
+    def code(self, value: Optional[str]) -> int:
+        if value not in self.codes:
+            self.codes[value] = len(self.codes)
+            self.strings.append(value)
+        return self.codes[value]
+
+    def add(self, typecode: str, values: Iterable) -> None:
+        self.sections.append(array(typecode, values))
+
+    def add_numbers(self, typecode: str, values: Iterable) -> None:
+        """
+        Add a section of numbers (lengths or coordinates) and the section that flags the ones that are ints.
+        """
+        values = list(values)
+        self.add(typecode, values)
+        self.add("B", (type(value) is int for value in values))
+
+    def to_bytes(self) -> bytes:
+        strings = array("b", "\0".join(self.strings).encode("utf-8"))
+        parts = [self.header.pack(self.magic, self.version, len(self.sections) + 1)]
+        for section in [strings] + self.sections:
+            if sys.byteorder == "big":
+                section.byteswap()
+            parts.append(self.section.pack(section.typecode.encode("ascii"), len(section)))
+            parts.append(section.tobytes())
+        return b"".join(parts)
+
+
+class SnapshotReader:
+    """
+    The SnapshotReader class decodes the bytes written by the SnapshotWriter class back into the flat arrays.
+    """
+    def __init__(self, data: bytes):
+        magic, version, nbr_sections = SnapshotWriter.header.unpack_from(data, 0)
+        if magic != SnapshotWriter.magic or version != SnapshotWriter.version:
+            raise ValueError(f"not a tray snapshot (version {SnapshotWriter.version})")
+        offset = SnapshotWriter.header.size
+        self.sections: List[array] = []
+        for _ in range(nbr_sections):
+            typecode, length = SnapshotWriter.section.unpack_from(data, offset)
+            offset += SnapshotWriter.section.size
+            section = array(typecode.decode("ascii"))
+            nbr_bytes = length * section.itemsize
+            section.frombytes(data[offset:offset + nbr_bytes])
+            if sys.byteorder == "big":
+                section.byteswap()
+            offset += nbr_bytes
+            self.sections.append(section)
+        strings = self.sections.pop(0).tobytes().decode("utf-8")
+        self.strings: List[Optional[str]] = [None] + (strings.split("\0") if strings else [])
+        self.next_section = iter(self.sections).__next__
+
+    def string(self, code: int) -> Optional[str]:
+        return self.strings[code]
+
+    def next_numbers(self) -> list:
+        """
+        Read a section of numbers added by SnapshotWriter.add_numbers, with the ints restored as ints.
+        """
+        values, ints = self.next_section(), self.next_section()
+        return [int(value) if is_int else value for value, is_int in zip(values, ints)]
+
+
+class CommandBuffer:
+    """
+    The CommandBuffer class holds the path commands of a part: an opcode per command and the coordinates of the
+    commands, in flat arrays.
+
+    opcodes & their coordinates:
+        - 0: move to    x, y
+        - 1: horizontal x
+        - 2: vertical   y
+        - 3: close
+
+    the coordinates are in the unit of the base ("d" floats, or "q" integer micrometres for a fixed point base).
+    The generators of the Base class emit their commands into buffers, the renderers & the statistics read them
+    back: svg_cmds (SVG path data), subpaths (the corner points of each closed subpath, e.g., for the DXF and
+    svg_turtles renderers) and cut_length & bounds. The ops & coords arrays can also be read directly (e.g., with a
+    memoryview) without copying them.
+
+    the ints array flags (1 byte per coordinate) the coordinates that were added as ints, so a float buffer gives
+    them back as ints (see value) and they are serialized as, e.g., "20" and not "20.0". The coordinates keep the
+    type they were given: the ones read from the aggregate grid have the type of the grid coordinate (see
+    AggregateGrid.x & y).
+    """
+    MOVE, HORZ, VERT, CLOSE = 0, 1, 2, 3
+    letters = "MHVZ"
+    arity = (2, 1, 1, 0)
+
+    def __init__(self, typecode: str = "d"):
+        self.ops = bytearray()
+        self.coords = array(typecode)
+        self.ints = bytearray()
+
+    def __len__(self):
+        return len(self.ops)
+
+    def move(self, x: float, y: float) -> None:
+        self.ops.append(self.MOVE)
+        self.coords.append(x)
+        self.coords.append(y)
+        self.ints.append(type(x) is int)
+        self.ints.append(type(y) is int)
+
+    def horz(self, x: float) -> None:
+        self.ops.append(self.HORZ)
+        self.coords.append(x)
+        self.ints.append(type(x) is int)
+
+    def vert(self, y: float) -> None:
+        self.ops.append(self.VERT)
+        self.coords.append(y)
+        self.ints.append(type(y) is int)
+
+    def line(self, letter: str, value: float) -> None:
+        """
+        Add a horizontal (letter H) or vertical (letter V) line.
+        """
+        self.ops.append(self.HORZ if letter == "H" else self.VERT)
+        self.coords.append(value)
+        self.ints.append(type(value) is int)
+
+    def close(self) -> None:
+        self.ops.append(self.CLOSE)
+
+    def fingers(
+        self,
+        letter: str,
+        start: float,
+        sign: int,
+        fngr_len: float,
+        spc_len: float,
+        nbr_of_spcs: int,
+        finger_coord: float,
+        edge_coord: float,
+    ) -> float:
+        """
+        Add the fingers & spaces of a finger joint edge. Each of the nbr_of_spcs + 1 fingers is a line across to
+        the finger side, a line along the edge for the finger length and a line back across to the edge side,
+        followed (except for the last finger) by a line along the edge for the space length.
+
+        :param letter:          the letter of the lines along the edge: H or V (the lines across get the other one)
+        :param start:           the coordinate along the edge where the first finger starts
+        :param sign:            1 if the edge runs towards increasing coordinates, -1 if it runs the other way
+        :param fngr_len:        the finger length
+        :param spc_len:         the space length
+        :param nbr_of_spcs:     the number of spaces (see Base.calc_min)
+        :param finger_coord:    the coordinate across the edge of the finger side
+        :param edge_coord:      the coordinate across the edge of the edge side
+        :return:                the coordinate along the edge where the last finger ends
+
+        the coordinates along the edge are 2 arithmetic sequences with a pitch of fngr_len + spc_len (the finger
+        ends & the space ends), so they are computed for all the fingers at once, interleaved with the coordinates
+        across the edge by slice assignment and added with a single extend, the opcodes are a repeated pattern of
+        4 commands.
+        """
+        along = self.HORZ if letter == "H" else self.VERT
+        across = self.HORZ + self.VERT - along
+        # the last finger is always added, even if the edge is too short for any finger (nbr_of_spcs < 0)
+        n = max(nbr_of_spcs + 1, 1)
+        pitch = sign * (fngr_len + spc_len)
+        finger_end = start + sign * fngr_len
+        coords = [edge_coord] * (4 * n - 1)
+        coords[0::4] = [finger_coord] * n
+        coords[1::4] = [finger_end + k * pitch for k in range(n)]
+        coords[3::4] = [start + k * pitch for k in range(1, n)]
+        self.ops.extend((bytes((across, along, across, along)) * n)[:-1])
+        self.coords.extend(coords)
+        self.ints.extend(type(value) is int for value in coords)
+        return coords[-2]
+
+    def value(self, c: int) -> float:
+        """
+        The coordinate at index c, as an int if it was added as an int.
+        """
+        value = self.coords[c]
+        return int(value) if self.ints[c] else value
+
+    def extend(self, other: CommandBuffer) -> None:
+        self.ops.extend(other.ops)
+        self.coords.extend(other.coords)
+        self.ints.extend(other.ints)
+
+    def svg_cmds(self, fmt: Callable[[float], str] = str, relative: bool = False) -> Iterator[str]:
+        """
+        Generate the SVG path commands, e.g., "M 0 0", "H 10", ..., "Z".
+
+        :param fmt:         the function serializing a coordinate (e.g., Base.mm)
+        :param relative:    True to use, for each command, the shorter of its absolute (M, H, V) and relative
+                            (m, h, v) encoding
+        """
+        coords = self.value
+        c = 0
+        x = y = start_x = start_y = 0
+        for op in self.ops:
+            if op == self.MOVE:
+                new_x, new_y = coords(c), coords(c + 1)
+                cmd = f"M {fmt(new_x)} {fmt(new_y)}"
+                if relative:
+                    rel_cmd = f"m {fmt(new_x - x)} {fmt(new_y - y)}"
+                    cmd = rel_cmd if len(rel_cmd) < len(cmd) else cmd
+                x = start_x = new_x
+                y = start_y = new_y
+                c += 2
+            elif op == self.CLOSE:
+                cmd = "Z"
+                # a close command moves the current point back to the start of the subpath
+                x, y = start_x, start_y
+            else:
+                value = coords(c)
+                cmd = f"{self.letters[op]} {fmt(value)}"
+                if relative:
+                    rel_cmd = f"{self.letters[op].lower()} {fmt(value - (x if op == self.HORZ else y))}"
+                    cmd = rel_cmd if len(rel_cmd) < len(cmd) else cmd
+                if op == self.HORZ:
+                    x = value
+                else:
+                    y = value
+                c += 1
+            yield cmd
+
+    def compact(self) -> CommandBuffer:
+        """
+        Create a compacted copy of the buffer that draws the same lines with fewer commands:
+            - the lines that do not move (e.g., a V to the current y) are dropped
+            - consecutive lines along the same axis and in the same direction are merged into 1 line (lines that
+              turn back are kept, merging them would drop the part of the line that is drawn twice)
+
+        :return:    the compacted command buffer
+        """
+        compacted = CommandBuffer(self.coords.typecode)
+        out_ops, out_coords, out_ints = compacted.ops, compacted.coords, compacted.ints
+        coords = self.value
+        c = 0
+        x = y = start_x = start_y = 0
+        last_op, last_sign = None, None
+        for op in self.ops:
+            if op == self.MOVE:
+                x = start_x = coords(c)
+                y = start_y = coords(c + 1)
+                compacted.move(x, y)
+                last_op = op
+            elif op == self.CLOSE:
+                compacted.close()
+                x, y = start_x, start_y
+                last_op = op
+            else:
+                value = coords(c)
+                curr = x if op == self.HORZ else y
+                if value != curr:
+                    sign = value > curr
+                    if op == last_op and sign == last_sign:
+                        out_coords[-1] = value
+                        out_ints[-1] = type(value) is int
+                    else:
+                        out_ops.append(op)
+                        out_coords.append(value)
+                        out_ints.append(type(value) is int)
+                    last_op, last_sign = op, sign
+                    if op == self.HORZ:
+                        x = value
+                    else:
+                        y = value
+            c += self.arity[op]
+        return compacted
+
+    def subpaths(self) -> Iterator[List[Tuple[float, float]]]:
+        """
+        Generate the points of each subpath (from a move to, up to the next move to), every line command adding
+        a point. A close command does not add a point, the subpath is closed back to its first point.
+        """
+        coords = self.value
+        c = 0
+        points: List[Tuple[float, float]] = []
+        x = y = 0
+        for op in self.ops:
+            if op == self.MOVE:
+                if points:
+                    yield points
+                x, y = coords(c), coords(c + 1)
+                points = [(x, y)]
+            elif op == self.HORZ:
+                x = coords(c)
+                points.append((x, y))
+            elif op == self.VERT:
+                y = coords(c)
+                points.append((x, y))
+            c += self.arity[op]
+        if points:
+            yield points
+
+    def cut_length(self) -> float:
+        """
+        The total length of the lines of the subpaths (including the closing lines).
+        """
+        return sum(
+            seg_length(x1, y1, x2, y2)
+            for points in self.subpaths()
+            for (x1, y1), (x2, y2) in cyclic_n_tuples(points, 2, 0)
+        )
+
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """
+        The bounding box (min x, min y, max x, max y) of the points.
+        """
+        points = [point for points in self.subpaths() for point in points]
+        xs = [x for x, _ in points]
+        ys = [y for _, y in points]
+        return min(xs), min(ys), max(xs), max(ys)
+
+
+class SvgWriter:
+    """
+    The SvgWriter class streams an SVG document to a (text) file-like object, one path at a time.
+
+    the path commands are collected in a buffer that is written to the file whenever it holds buffer_size
+    characters or more, so the memory used does not depend on the size of the document: at most the buffer and
+    the commands of the part being written (see Base.write_svg).
+
+    usage:
+        with SvgWriter(fh, width, height) as writer:
+            writer.start_group("base")
+            writer.write_path(svg_cmds)
+            writer.end_group()
+
+    width & height are the serialized size of the document in millimetres, which is also used as the view box, so
+    the coordinates of the paths are in millimetres.
+    """
+    # the attributes of the path elements: a hairline outline, as used by the laser cutter software
+    path_attrs = 'fill="none" stroke="red" stroke-width="0.1"'
+
+    def __init__(self, fh, width: str, height: str, buffer_size: int = 65536):
+        self.fh = fh
+        self.width = width
+        self.height = height
+        self.buffer_size = buffer_size
+        self.buffer: List[str] = []
+        self.buffer_len = 0
+        self.nbr_paths = 0
+
+    def __enter__(self) -> SvgWriter:
+        self.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        self.write(
+            f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" width="{self.width}mm" height="{self.height}mm" '
+            f'viewBox="0 0 {self.width} {self.height}">\n'
+        )
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.write("</svg>\n")
+        self.flush()
+
+    def write(self, text: str) -> None:
+        self.buffer.append(text)
+        self.buffer_len += len(text)
+        if self.buffer_len >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.fh.write("".join(self.buffer))
+            self.buffer.clear()
+            self.buffer_len = 0
+
+    def start_group(self, group_id: str) -> None:
+        self.write(f'<g id="{group_id}">\n')
+
+    def end_group(self) -> None:
+        self.write("</g>\n")
+
+    def write_path(self, svg_cmds: Iterable[str]) -> None:
+        """
+        Write a path element.
+
+        :param svg_cmds:    the SVG commands of the path (e.g., "M 0 0", "H 10", ...), an iterator is consumed as
+                            the path is written
+        """
+        self.write('<path d="')
+        sep = ""
+        for svg_cmd in svg_cmds:
+            self.write(sep + svg_cmd)
+            sep = " "
+        self.write(f'" {self.path_attrs}/>\n')
+        self.nbr_paths += 1
+
+
+def stage(name: str, *deps: str) -> Callable:
+    """
+    Decorator that turns a Base method into a memoized pipeline stage.
+
+    :param name:    the name of the stage, see Base.stages
+    :param deps:    the names of the stages that have to be computed before this stage
+    :return:        the decorated method
+
+    calling the decorated method first computes the stages it depends on (if they have not been computed yet),
+    then runs the method and records the stage as computed. Calling it again is a no-op until the stage is
+    invalidated (see Base.invalidate).
+    """
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self: Base, *args, **kwargs):
+            if name in self.stages_done:
+                return
+            for dep in deps:
+                self.require(dep)
+            method(self, *args, **kwargs)
+            self.stages_done.add(name)
+        return wrapper
+    return decorator
+
+
+class Base:
+    """
+    The Base class represents the dimensions of the base of the tray. It uses a path of points to
+    describe the polygon shape will form the base of the tray.
+
+    the calculations are done in stages, that are computed on demand (see the stage decorator) by the methods
+    that need their results, so they do not have to be called in order by hand:
+        - dim_paths:    calc_dim_paths      the DimPaths for the index paths
+        - norm_paths:   normalize_paths     the normalized (no collinear points) index & DimPaths
+        - path_walls:   create_path_walls   the exterior walls along the normalized paths
+        - walls:        proc_walls          the wall intersections, base slots & exterior walls
+
+    changing the paths or walls invalidates the stages that depend on them.
+    """
+    # stages is a dictionary used to look up the method name & the dependent stages of a given stage
+    stages: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+        "dim_paths": ("calc_dim_paths", ("norm_paths",)),
+        "norm_paths": ("normalize_paths", ("path_walls",)),
+        "path_walls": ("create_path_walls", ("walls",)),
+        "walls": ("proc_walls", ()),
+    }
+
+    # direction_dims is a dictionary used to look up the outer, inner tuple pair for a given
+    #   combination of path orientation, prev_direction and current direction
+    direction_dims: Dict[str, Dict[str, Dict[str, Tuple[int, int]]]] = {
+        "cw": {
+            "left": {"left": (7, 2), "up": (6, 3), "down": (8, 1)},
+            "right": {"right": (2, 7), "up": (1, 8), "down": (3, 6)},
+            "up": {"left": (6, 3), "right": (1, 8), "up": (4, 5)},
+            "down": {"left": (8, 1), "right": (3, 6), "down": (5, 4)},
+        },
+        "ccw": {
+            "left": {"left": (2, 7), "up": (3, 6), "down": (1, 8)},
+            "right": {"right": (7, 2), "up": (8, 1), "down": (6, 3)},
+            "up": {"left": (3, 6), "right": (8, 1), "up": (5, 4)},
+            "down": {"left": (1, 8), "right": (6, 3), "down": (4, 5)},
+        },
+    }
+
+    def __init__(
+        self,
+        mat_thick: float,
+        fngr_len: float,
+        spc_len: float,
+        min_be_len: float,
+        col_widths: List[float],
+        row_heights: List[float],
+        max_tbslt_bt_xs: int,
+        min_tbslt_len: int,
+        wall_tbslt_dist: float,
+        depth: float,
+        on_center: bool = False,
+        fixed_point: bool = False,
+    ):
+        """
+        Create a Base object
+
+        :param mat_thick:       material thickness
+        :param fngr_len:        finger length - the width of a finger joint
+        :param spc_len:         space length - the width of a space within a finger joint
+        :param min_be_len:      minimum beginning / ending length - the minimal width of the space that come before
+                                and after the finger/space joint
+        :param col_widths:      list of column widths to use to calculate the base dimensions (aggregate points)
+        :param row_heights:     list of row heights to use to calculate the base dimensions (aggregate points)
+        :param depth:           how high the walls are...
+        :param fixed_point:     if True, all the lengths & coordinates are integer micrometres instead of floats
+
+        all the lengths are given in millimetres. For a fixed point base they are converted to integer micrometres
+        (see to_units) and all the calculations are done with integers: the coordinates are exact, so they can be
+        compared, hashed and deduplicated, and accumulating the finger & space lengths along an edge does not drift.
+        the halves and ratios are rounded down to the micrometre. The coordinates are converted back to millimetres
+        when they are written to the SVG paths (see mm).
+
+        the joint parameters (fngr_len, spc_len, min_be_len, max_tbslt_bt_xs, min_tbslt_len & wall_tbslt_dist) are
+        kept in a JointSpec object (see the joints attribute) and are available as read only attributes.
+        """
+        self.fixed_point = fixed_point
+        self.init_state()
+        self.joints = JointSpec(
+            fngr_len=self.to_units(fngr_len),
+            spc_len=self.to_units(spc_len),
+            min_be_len=self.to_units(min_be_len),
+            max_tbslt_bt_xs=max_tbslt_bt_xs,
+            min_tbslt_len=self.to_units(min_tbslt_len),
+            wall_tbslt_dist=self.to_units(wall_tbslt_dist),
+        )
+        self.index_paths: List[IndexPath] = []
+        self.dim_paths: List[DimPath] = []
+
+        self.norm_index_paths: List[IndexPath] = []
+        self.norm_dim_paths: List[DimPath] = []
+
+        self.index_walls: List[IndexWall] = []
+        self.path_index_walls: List[IndexWall] = []
+        self.base_slots: List[WallSlot] = []
+        self.exterior_walls: List[WallSlot] = []
+
+        self.mat_thick = self.to_units(mat_thick)
+        self.depth_outer = self.to_units(depth)
+
+        self.on_center = on_center
+        self.col_widths = [self.to_units(col_width) for col_width in col_widths]
+        self.nbr_cols = len(self.col_widths)
+        self.width = sum(self.col_widths) + self.mat_thick if self.on_center else 0
+
+        self.row_heights = [self.to_units(row_height) for row_height in row_heights]
+        self.nbr_rows = len(self.row_heights)
+        self.height = sum(self.row_heights) + self.mat_thick if self.on_center else 0
+
+        self.agg_coords: Optional[AggregateGrid] = None
+        # the prefix sums of the (adjusted) column widths & row heights, i.e., the offsets of the column & row lines
+        #   (see calc_offsets), used to locate x, y coordinates on the grid (see locate)
+        self.col_offsets: Optional[array] = None
+        self.row_offsets: Optional[array] = None
+        self.agg_oc = on_center
+
+        # self.calc_coords()
+
+    def init_state(self) -> None:
+        """
+        Set the attributes of the base that are not part of its layout (see Layout) nor its joint parameters: the
+        wall junction classifier, the results built on demand, the point dependencies, the stages done, the id
+        sequences and the frozen flag. Called by the constructor, from_layout & from_snapshot, which then restore
+        the layout.
+        """
+        # the junctions of the walls are found by intersecting the walls (see WallSweep) unless lattice_walls is set
+        self._lattice_walls = False
+        # the joint plans by length, built on demand (see get_joint_plan)
+        self.joint_plan: Optional[JointPlan] = None
+        # the compartments and the spatial index of the wall slots & compartments, built on demand
+        #   (see get_compartments & get_spatial_index)
+        self.compartments: Optional[List[Compartment]] = None
+        # the grid lines of the parts, by kind of part, used to find the parts to re-render (see update_layout)
+        self.part_lines: Optional[Dict[str, List[Tuple[Tuple[int, ...], Tuple[int, ...]]]]] = None
+        self.spatial_index: Optional[SpatialIndex] = None
+
+        # x_deps & y_deps list, by stage and for each column (row) line, the (Point, slot) pairs whose x (y)
+        #   coordinate was taken from that line's min (slot 0), avg (slot 1) or max (slot 2) coordinate. used to move
+        #   the points in place when a column width or row height is updated.
+        self.x_deps: Dict[str, List[List[Tuple[Point, int]]]] = {}
+        self.y_deps: Dict[str, List[List[Tuple[Point, int]]]] = {}
+
+        self.stages_done: Set[str] = set()
+
+        # the ids of the DimPoint & Wall objects are assigned from sequences owned by the base (and restarted when
+        #   the stages creating them are invalidated), so the ids do not depend on other bases built before or
+        #   at the same time (e.g., in other threads)
+        self.dim_point_seq = count(1)
+        self.wall_seq = count(1)
+
+        # a frozen base shares its layout with a Layout object, so the layout can no longer be changed
+        self.frozen = False
+
+    def to_units(self, length: float) -> float:
+        """
+        Convert a length in millimetres to the unit of the base: the length itself, or for a fixed point base the
+        length rounded to integer micrometres.
+        """
+        return round(length * UM_PER_MM) if self.fixed_point else length
+
+    def mm(self, value: float) -> str:
+        """
+        Serialize a length or coordinate of the base to millimetres, for the SVG paths.
+        """
+        return format_um(value) if self.fixed_point else str(value)
+
+    def command_buffer(self) -> CommandBuffer:
+        """
+        Create an empty command buffer for the coordinates of the base ("q" for a fixed point base).
+        """
+        return CommandBuffer("q" if self.fixed_point else "d")
+
+    def short_mm(self, value: float) -> str:
+        """
+        Serialize a length or coordinate of the base to millimetres, without a trailing .0 (e.g., 25 for 25.0).
+        """
+        text = self.mm(value)
+        return text[:-2] if text.endswith(".0") else text
+
+    def div(self, value: float, n: int) -> float:
+        """
+        Divide a length of the base by n (rounded down to the micrometre for a fixed point base).
+        """
+        return value // n if self.fixed_point else value / n
+
+    @property
+    def lattice_walls(self) -> bool:
+        """
+        True if the junctions of the walls are classified on the column / row lattice (see WallLattice) instead of
+        by intersecting the walls' x, y coordinates (see WallSweep). Changing it invalidates the walls stage, so the
+        walls are re-computed with the new mode. Both modes list the wall slots in the same order.
+        """
+        return self._lattice_walls
+
+    @lattice_walls.setter
+    def lattice_walls(self, lattice_walls: bool) -> None:
+        if lattice_walls != self._lattice_walls:
+            self.invalidate("walls")
+            self._lattice_walls = lattice_walls
+
+    @property
+    def fngr_len(self) -> float:
+        return self.joints.fngr_len
+
+    @property
+    def spc_len(self) -> float:
+        return self.joints.spc_len
+
+    @property
+    def min_be_len(self) -> float:
+        return self.joints.min_be_len
+
+    @property
+    def max_tbslt_bt_xs(self) -> int:
+        return self.joints.max_tbslt_bt_xs
+
+    @property
+    def min_tbslt_len(self) -> int:
+        return self.joints.min_tbslt_len
+
+    @property
+    def wall_tbslt_dist(self) -> float:
+        return self.joints.wall_tbslt_dist
+
+    def freeze_layout(self) -> Layout:
+        """
+        Compute all the stages of the base and return the resulting layout.
+
+        :return:    the Layout object
+
+        the Layout object shares the computed objects (paths, wall slots, ...) with the base, so after calling
+        freeze_layout the layout of the base can no longer be changed (i.e., the paths, walls, column widths and
+        row heights).
+        """
+        self.require("walls")
+        self.frozen = True
+        return Layout(
+            **{
+                field.name: tuple(value) if isinstance(value, list) else value
+                for field in fields(Layout)
+                for value in (getattr(self, field.name),)
+            }
+        )
+
+    @classmethod
+    def from_layout(cls, layout: Layout, joints: JointSpec) -> Base:
+        """
+        Create a base from a computed layout and the given joint parameters, without repeating the layout
+        calculations.
+
+        :param layout:  the layout created by freeze_layout
+        :param joints:  the joint parameters to render the layout with, in the unit of the layout (i.e., micrometres
+                        for a fixed point layout)
+        :return:        a frozen Base object that can be rendered with the gen_svg_* methods
+        """
+        base = cls.__new__(cls)
+        base.init_state()
+        for field in fields(Layout):
+            # the lattice_walls setter would invalidate the walls of the layout, so the mode is restored as is
+            name = "_lattice_walls" if field.name == "lattice_walls" else field.name
+            setattr(base, name, getattr(layout, field.name))
+        base.joints = joints
+        base.stages_done = set(cls.stages)
+        base.frozen = True
+        return base
+
+    @classmethod
+    def from_table(
+        cls,
+        table,
+        fngr_len: float,
+        spc_len: float,
+        min_be_len: float,
+        min_tbslt_len: float,
+        max_tbslt_bt_xs: int,
+        wall_tbslt_dist: float,
+        on_center: bool = True,
+        fixed_point: bool = False,
+    ) -> Base:
+        """
+        Create a base from a main2 Table2 (rows of ColCell spans) or Table (rows of Cell wall flags).
+
+        :param table:   the Table2 or Table object, its mat_thick, col_widths, row_heights & depth_outer are used
+        :return:        the Base object, with the paths of the base and its interior walls added
+
+        the remaining parameters are the joint parameters of the Base constructor. See TableCompiler for how the
+        table is compiled into the paths & walls.
+        """
+        if hasattr(table, "rows"):
+            compiler = TableCompiler.from_table2(table)
+        else:
+            compiler = TableCompiler.from_cells(table)
+        base = cls(
+            mat_thick=table.mat_thick,
+            fngr_len=fngr_len,
+            spc_len=spc_len,
+            min_be_len=min_be_len,
+            col_widths=table.col_widths,
+            row_heights=table.row_heights,
+            min_tbslt_len=min_tbslt_len,
+            max_tbslt_bt_xs=max_tbslt_bt_xs,
+            wall_tbslt_dist=wall_tbslt_dist,
+            depth=table.depth_outer,
+            on_center=on_center,
+            fixed_point=fixed_point,
+        )
+        if on_center:
+            base.calc_agg_coords_oc()
+        else:
+            base.calc_agg_coords()
+        for path in compiler.paths():
+            base.start_path(*path[0])
+            for x_index, y_index in path[1:]:
+                base.extend_path(x_index, y_index)
+            base.end_path()
+        for start, end in compiler.walls():
+            base.add_wall(start, end)
+        return base
+
+    def with_joints(self, **changes) -> Base:
+        """
+        Create a base with the layout of this base and the given joint parameters changed.
+
+        :param changes:     the joint parameters to change, e.g., fngr_len=15.0 (lengths in millimetres)
+        :return:            a frozen Base object
+        """
+        changes = {
+            name: value if name == "max_tbslt_bt_xs" else self.to_units(value) for name, value in changes.items()
+        }
+        return self.from_layout(self.freeze_layout(), replace(self.joints, **changes))
+
+    def snapshot(self) -> bytes:
+        """
+        Serialize the computed layout of the base into a compact binary snapshot.
+
+        :return:    the snapshot bytes, see from_snapshot
+
+        all the stages are computed first. The snapshot holds flat arrays (see SnapshotWriter) of:
+            - the parameters, joint parameters, column widths, row heights and aggregate grid coordinates
+            - the index paths and the interior index walls
+            - the DimPaths and the normalized DimPaths: per point the direction, line type, corner side, column &
+              row indices, ids and the outside, on-center & inside x, y coordinates
+            - the base slots and the exterior walls: per intersection the type, subtype, column & row indices
+              and x, y coordinates, and for the exterior walls the normalized DimPoint that the wall starts at
+
+        the prev & next links of the DimPoints are not stored, as they follow from the order of the points.
+        """
+        self.require("walls")
+        writer = SnapshotWriter()
+        code = writer.code
+        joints = self.joints
+        # the lengths & coordinates are integer micrometres (int64) for a fixed point base
+        num = "q" if self.fixed_point else "d"
+        writer.add("i", (
+            self.nbr_cols, self.nbr_rows, joints.max_tbslt_bt_xs, self.on_center, self.agg_oc, self.fixed_point,
+            self.lattice_walls,
+        ))
+        writer.add_numbers(num, (
+            self.mat_thick, self.depth_outer, self.width, self.height, joints.fngr_len, joints.spc_len,
+            joints.min_be_len, joints.min_tbslt_len, joints.wall_tbslt_dist,
+        ))
+        writer.add_numbers(num, self.col_widths)
+        writer.add_numbers(num, self.row_heights)
+        # the grid coordinates are stored with their own int flags (see AggregateGrid)
+        writer.add(num, self.agg_coords.x_coords)
+        writer.add("B", self.agg_coords.x_ints)
+        writer.add(num, self.agg_coords.y_coords)
+        writer.add("B", self.agg_coords.y_ints)
+
+        writer.add("i", (
+            value for i_path in self.index_paths for value in (code(i_path.orientation), len(i_path.index_points))
+        ))
+        writer.add("i", (
+            value
+            for i_path in self.index_paths
+            for i_pt in i_path.index_points
+            for value in (i_pt.x_index, i_pt.y_index, code(i_pt.line_type))
+        ))
+        writer.add("i", (
+            value
+            for i_wall in self.index_walls
+            for value in (*i_wall.start_pt.gxy, *i_wall.end_pt.gxy, code(i_wall.wall_type))
+        ))
+
+        for dim_paths in (self.dim_paths, self.norm_dim_paths):
+            writer.add("i", (
+                value for dim_path in dim_paths for value in (code(dim_path.path_ori), len(dim_path.path_points))
+            ))
+            dim_pts = [dim_pt for dim_path in dim_paths for dim_pt in dim_path.path_points]
+            writer.add("i", (
+                value
+                for dim_pt in dim_pts
+                for value in (
+                    code(dim_pt.direction), code(dim_pt.line_type), code(dim_pt.corner_side),
+                    *dim_pt.index_point.gxy,
+                    -1 if dim_pt.id is None else dim_pt.id,
+                    -1 if dim_pt.copy_id is None else dim_pt.copy_id,
+                )
+            ))
+            writer.add_numbers(num, (
+                value
+                for dim_pt in dim_pts
+                for point in (dim_pt.outside_pt, dim_pt.on_center_pt, dim_pt.inside_pt)
+                for value in (point.x, point.y)
+            ))
+
+        # the exterior walls add their (non corner) intersections to the DimPoint that the wall starts at
+        owners = {
+            id(intrxn): n
+            for n, dim_pt in enumerate(dim_pt for dim_path in self.norm_dim_paths for dim_pt in dim_path.path_points)
+            for intrxn in dim_pt.intersections
+        }
+        for wall_slots in (self.base_slots, self.exterior_walls):
+            writer.add("i", (
+                value
+                for wall_slot in wall_slots
+                for value in (
+                    code(wall_slot.type),
+                    len(wall_slot.intersections),
+                    next((owners[id(i)] for i in wall_slot.intersections if id(i) in owners), -1),
+                )
+            ))
+            intrxns = [intrxn for wall_slot in wall_slots for intrxn in wall_slot.intersections]
+            writer.add("i", (
+                value
+                for intrxn in intrxns
+                for value in (code(intrxn.x_type), code(intrxn.x_subtype), *(intrxn.gxy or (-1, -1)))
+            ))
+            writer.add_numbers(num, (value for intrxn in intrxns for value in (intrxn.intrxn.x, intrxn.intrxn.y)))
+
+        return writer.to_bytes()
+
+    @classmethod
+    def from_snapshot(cls, data: bytes) -> Base:
+        """
+        Create a base from a snapshot created by the snapshot method.
+
+        :param data:    the snapshot bytes
+        :return:        a frozen Base object (see freeze_layout) that can be rendered with the gen_svg_* methods
+        """
+        reader = SnapshotReader(data)
+        string = reader.string
+        section = reader.next_section
+        numbers = reader.next_numbers
+
+        base = cls.__new__(cls)
+        base.init_state()
+        base.nbr_cols, base.nbr_rows, max_tbslt_bt_xs, on_center, agg_oc, fixed_point, lattice_walls = section()
+        base._lattice_walls = bool(lattice_walls)
+        base.on_center = bool(on_center)
+        base.agg_oc = bool(agg_oc)
+        base.fixed_point = bool(fixed_point)
+        (
+            base.mat_thick, base.depth_outer, base.width, base.height, fngr_len, spc_len, min_be_len,
+            min_tbslt_len, wall_tbslt_dist,
+        ) = numbers()
+        base.joints = JointSpec(fngr_len, spc_len, min_be_len, max_tbslt_bt_xs, min_tbslt_len, wall_tbslt_dist)
+        base.col_widths = numbers()
+        base.row_heights = numbers()
+        base.agg_coords = AggregateGrid((), (), base.mat_thick, "q" if base.fixed_point else "d")
+        base.agg_coords.x_coords, base.agg_coords.x_ints = section(), bytearray(section())
+        base.agg_coords.y_coords, base.agg_coords.y_ints = section(), bytearray(section())
+        base.agg_coords.nbr_x = len(base.agg_coords.x_coords) // 3
+        base.agg_coords.nbr_y = len(base.agg_coords.y_coords) // 3
+        base.col_offsets = base.agg_coords.x_coords[0::3]
+        base.row_offsets = base.agg_coords.y_coords[0::3]
+
+        headers, i_ints = section(), section()
+        base.index_paths = []
+        k = 0
+        for ori_code, nbr_points in zip(headers[0::2], headers[1::2]):
+            i_path = IndexPath(orientation=string(ori_code))
+            for x_index, y_index, line_type in zip(*[iter(i_ints[3 * k:3 * (k + nbr_points)])] * 3):
+                i_path.add_point(IndexPoint(x_index, y_index, string(line_type)))
+            base.index_paths.append(i_path)
+            k += nbr_points
+        i_walls = section()
+        base.index_walls = [
+            IndexWall(IndexPoint(x1, y1), IndexPoint(x2, y2), string(wall_type))
+            for x1, y1, x2, y2, wall_type in zip(*[iter(i_walls)] * 5)
+        ]
+
+        all_dim_paths = []
+        for _ in range(2):
+            headers, p_ints, p_coords = section(), section(), numbers()
+            dim_paths = []
+            k = 0
+            for ori_code, nbr_points in zip(headers[0::2], headers[1::2]):
+                dim_path = DimPath(string(ori_code))
+                for n in range(k, k + nbr_points):
+                    direction, line_type, corner_side, x_index, y_index, pt_id, copy_id = p_ints[7 * n:7 * n + 7]
+                    ox, oy, cx, cy, ix, iy = p_coords[6 * n:6 * n + 6]
+                    dim_pt = DimPoint(
+                        string(direction), string(line_type), Point(ox, oy), Point(cx, cy), Point(ix, iy),
+                        IndexPoint(x_index, y_index, string(line_type)),
+                        None if copy_id < 0 else copy_id,
+                        None if pt_id < 0 else pt_id,
+                    )
+                    dim_pt.index_point.dim_point = dim_pt
+                    dim_pt.corner_side = string(corner_side)
+                    dim_path.append(dim_pt)
+                if dim_path.path_points:
+                    dim_path.set_wrap()
+                dim_paths.append(dim_path)
+                k += nbr_points
+            all_dim_paths.append(dim_paths)
+        base.dim_paths, base.norm_dim_paths = all_dim_paths
+
+        base.norm_index_paths = [
+            IndexPath(orientation=dim_path.path_ori) for dim_path in base.norm_dim_paths
+        ]
+        base.path_index_walls = []
+        for n_i_path, dim_path in zip(base.norm_index_paths, base.norm_dim_paths):
+            n_i_path.index_points = [dim_pt.index_point for dim_pt in dim_path.path_points]
+            for curr_pt, next_pt in cyclic_n_tuples(n_i_path.index_points, 2, 0):
+                base.path_index_walls.append(IndexWall(curr_pt, next_pt, "finger"))
+
+        norm_dim_pts = [dim_pt for dim_path in base.norm_dim_paths for dim_pt in dim_path.path_points]
+        all_wall_slots = []
+        for _ in range(2):
+            headers, x_ints, x_coords = section(), section(), numbers()
+            wall_slots = []
+            k = 0
+            for ws_type, nbr_intrxns, owner in zip(*[iter(headers)] * 3):
+                wall_slot = WallSlot(string(ws_type), is_sorted=True)
+                dim_pt = norm_dim_pts[owner] if owner >= 0 else None
+                for n in range(k, k + nbr_intrxns):
+                    x_type, x_subtype, gx, gy = x_ints[4 * n:4 * n + 4]
+                    wall_slot.add(
+                        Point(x_coords[2 * n], x_coords[2 * n + 1]), string(x_type), string(x_subtype), dim_pt,
+                        None if gx < 0 else (gx, gy),
+                    )
+                wall_slots.append(wall_slot)
+                k += nbr_intrxns
+            all_wall_slots.append(wall_slots)
+        base.base_slots, base.exterior_walls = all_wall_slots
+
+        base.stages_done = set(cls.stages)
+        base.frozen = True
+        return base
+
+    def check_mutable(self) -> None:
+        if self.frozen:
+            raise ValueError("the layout of this base is frozen (see freeze_layout) and can no longer be changed")
+
+    def get_avg_agg_point(self, index_point: IndexPoint) -> Point:
+        """
+        Returns the AVG point from the AggregatePoint corresponding to the specified IndexPoint
+
+        :param index_point:     the index point to get the AVG aggregate x,y coordinate values
+        :return:                the Point object for the AVG coordinate of the AggregatePoint
+
+        IndexPoint objects represent the column (x) and row (y) position within the 2D AggregatePoint grid
+        """
+        return self.agg_coords.avg(index_point.x_index, index_point.y_index)
+
+    def get_dims_from_agg_points(
+        self, index_point: IndexPoint, outside: int, inside: int
+    ) -> Tuple[Point, Point]:
+        """
+        Returns the inside and outside dimensions (x, y coords) points for a given index point and point numbers.
+
+        :param index_point:     index point corresponding to the aggregate point you wish to get the
+                                inside and outside dimensional points for
+        :param outside:         point number to get for the outside dimensional point
+        :param inside:          point number to get for the inside dimensional point
+        :return:                the x, y coordinates (outside, inside) corresponding to the point numbers specified
+
+        the agg_pt.get() method takes a point number and returns real point object based on that as follows
+            pt nbr 1:       x_min, y_min
+            pt nbr 2:       x_avg, y_min
+            pt nbr 3:       x_max, y_max
+            pt nbr 4:       x_min, y_avg
+            pt nbr 5:       x_max, y_avg
+            pt nbr 6:       x_min, y_max
+            pt nbr 7:       x_avg, y_max
+            pt nbr 8:       x_max, y_max
+        """
+        # get the outside & inside dimensional coordinates based on the point numbers (1 - 8) passed in
+        #   by indexing into the aggregate grid at the node corresponding to the index point passed in
+        x_index, y_index = index_point.gxy
+        outside_pt = self.agg_coords.get(x_index, y_index, outside)
+        inside_pt = self.agg_coords.get(x_index, y_index, inside)
+
+        return outside_pt, inside_pt
+
+    def calc_offsets(self, sizes: List[float], total: float) -> List[float]:
+        """
+        Calculate the offsets of the column (or row) lines from the column widths (or row heights).
+
+        :param sizes:   the column widths or row heights
+        :param total:   the total width or height
+        :return:        the offset of each line, i.e., len(sizes) + 1 values starting with 0
+
+        for on-center aggregate coordinates the offsets are the running totals of the sizes. Otherwise, each size is
+        adjusted by the ratio of the inside dimension to the total (see calc_agg_coords) and the material thickness
+        is added to it before accumulating.
+        """
+        if self.agg_oc:
+            return list(accumulate(sizes, initial=0))
+
+        # calc the ratio to adjust the sizes by
+        #   total_mat_thickness = (nbr_of_sizes + 1) * mat_thick
+        #   total_inside_dim_sizes = total_of_all_sizes - total_mat_thickness
+        #   ratio = total_inside_dim_sizes / total_of_all_sizes
+        ratio = (total - ((len(sizes) + 1) * self.mat_thick)) / total
+
+        # calc the offsets by accumulating
+        #   the adj sizes (i.e., inside dim sizes, rounded to the micrometre for a fixed point base)
+        #   plus the mat_thickness
+        if self.fixed_point:
+            return list(accumulate((round(size * ratio) + self.mat_thick for size in sizes), initial=0))
+        return list(accumulate((size * ratio + self.mat_thick for size in sizes), initial=0))
+
+    def calc_agg_coords_oc(self):
+        # the column & row offsets are the running totals of the column widths & row heights
+        self.agg_oc = True
+        self.build_agg_coords()
+
+    def calc_agg_coords(self):
+        # the column & row widths are adjusted for the material thickness before accumulating
+        self.agg_oc = False
+        self.build_agg_coords()
+
+    def build_agg_coords(self):
+        self.check_mutable()
+        typecode = "q" if self.fixed_point else "d"
+        # the grid is built from the offsets themselves (not from the arrays), so it keeps the int offsets as ints
+        col_offsets = self.calc_offsets(self.col_widths, self.width)
+        row_offsets = self.calc_offsets(self.row_heights, self.height)
+        self.col_offsets = array(typecode, col_offsets)
+        self.row_offsets = array(typecode, row_offsets)
+        self.agg_coords = AggregateGrid(col_offsets, row_offsets, self.mat_thick, typecode)
+        self.invalidate("dim_paths")
+
+    def locate(self, x: float, y: float) -> Tuple[IndexPoint, Optional[Tuple[int, int]]]:
+        """
+        Map an x, y position (in millimetres) back to the column / row grid.
+
+        :param x:   the x coordinate
+        :param y:   the y coordinate
+        :return:    a tuple of:
+                        - the IndexPoint of the nearest grid node, i.e., the column line & row line whose on-center
+                          coordinates are the nearest to x & y
+                        - the (column, row) of the cell that contains the position (between the on-center
+                          coordinates of its lines), or None if the position is outside of the grid
+
+        the column (row) lines are found by bisecting the column (row) offsets, so a position is located in
+        O(log n) for a grid with n columns (rows). See locate_many to locate a batch of positions.
+        """
+        (x_index,), (col,) = self._locate_axis(self.col_offsets, (x,))
+        (y_index,), (row,) = self._locate_axis(self.row_offsets, (y,))
+        cell = (col, row) if col is not None and row is not None else None
+        return IndexPoint(x_index, y_index), cell
+
+    def locate_many(
+        self, xs: Iterable[float], ys: Iterable[float]
+    ) -> Tuple[List[int], List[int], List[Optional[int]], List[Optional[int]]]:
+        """
+        Map a batch of x, y positions (in millimetres) back to the column / row grid (see locate).
+
+        :param xs:  the x coordinates
+        :param ys:  the y coordinates
+        :return:    a tuple of 4 lists, for each position: the column line & row line of the nearest grid node and the
+                    column & row of the cell that contains the position (None if outside of the grid)
+
+        each axis is handled separately, with the offsets and the conversion to the base's unit looked up once per
+        batch instead of once per position.
+        """
+        x_indices, cols = self._locate_axis(self.col_offsets, xs)
+        y_indices, rows = self._locate_axis(self.row_offsets, ys)
+        return x_indices, y_indices, cols, rows
+
+    def to_mm(self, value: float) -> float:
+        """
+        Convert a length of the base to millimetres (see to_units).
+        """
+        return value / UM_PER_MM if self.fixed_point else value
+
+    def get_compartments(self) -> List[Compartment]:
+        """
+        Get the compartments of the tray, extracting them if needed.
+
+        :return:    the list of Compartment objects
+
+        the cells inside the base are found by counting the vertical lines of the (normalized) paths crossed when
+        going along each row, so the cells inside holes are left out. The walls (interior & path walls) are
+        rasterized onto a WallLattice and a union-find over the cells merges each cell with its right and lower
+        neighbours unless a wall separates them, which runs in near-linear time in the number of cells.
+
+        the inside of a cell is its on-center rectangle, minus half the material thickness on the sides that have
+        a wall and minus the corner of the wall junction at the corners where the cell has no wall, but the node
+        does (e.g., the inside corner of an L shaped compartment).
+
+        the compartments are discarded when the walls are re-computed or the layout is updated (see update_layout).
+        """
+        if self.compartments is not None:
+            return self.compartments
+        self.require("walls")
+        nbr_cols, nbr_rows = self.nbr_cols, self.nbr_rows
+        lattice = WallLattice(nbr_cols, nbr_rows)
+        for index_wall in self.merge_index_walls(self.index_walls) + list(self.path_index_walls):
+            lattice.add(index_wall.start_pt.gxy, index_wall.end_pt.gxy)
+        lattice.classify()
+        horz, vert, masks = lattice.horz, lattice.vert, lattice.masks
+
+        # the cells are numbered like the vertical lattice edges: x * nbr_rows + y
+        crossings = bytearray((nbr_cols + 1) * nbr_rows)
+        for n_i_path in self.norm_index_paths:
+            for curr_pt, next_pt in cyclic_n_tuples(n_i_path.index_points, 2, 0):
+                if curr_pt.x_index == next_pt.x_index:
+                    for y in range(min(curr_pt.y_index, next_pt.y_index), max(curr_pt.y_index, next_pt.y_index)):
+                        crossings[curr_pt.x_index * nbr_rows + y] ^= 1
+        inside = bytearray(nbr_cols * nbr_rows)
+        for y in range(nbr_rows):
+            parity = 0
+            for x in range(nbr_cols):
+                parity ^= crossings[x * nbr_rows + y]
+                inside[x * nbr_rows + y] = parity
+
+        # open_right & open_down flag the cells that are merged with their right (lower) neighbour
+        open_right = bytearray(nbr_cols * nbr_rows)
+        open_down = bytearray(nbr_cols * nbr_rows)
+        parent = array("l", range(nbr_cols * nbr_rows))
+        size = array("l", [1]) * (nbr_cols * nbr_rows)
+
+        def find(c: int) -> int:
+            # path halving
+            while parent[c] != c:
+                parent[c] = parent[parent[c]]
+                c = parent[c]
+            return c
+
+        def union(c1: int, c2: int) -> None:
+            # union by size
+            r1, r2 = find(c1), find(c2)
+            if r1 != r2:
+                if size[r1] < size[r2]:
+                    r1, r2 = r2, r1
+                parent[r2] = r1
+                size[r1] += size[r2]
+
+        for x in range(nbr_cols):
+            for y in range(nbr_rows):
+                c = x * nbr_rows + y
+                if not inside[c]:
+                    continue
+                if x + 1 < nbr_cols and inside[c + nbr_rows] and not vert[(x + 1) * nbr_rows + y]:
+                    open_right[c] = 1
+                    union(c, c + nbr_rows)
+                if y + 1 < nbr_rows and inside[c + 1] and not horz[(y + 1) * nbr_cols + x]:
+                    open_down[c] = 1
+                    union(c, c + 1)
+
+        xc, yc = self.agg_coords.x_coords, self.agg_coords.y_coords
+        compartments: Dict[int, Compartment] = {}
+        for y in range(nbr_rows):
+            for x in range(nbr_cols):
+                c = x * nbr_rows + y
+                if not inside[c]:
+                    continue
+                root = find(c)
+                if root not in compartments:
+                    compartments[root] = Compartment(len(compartments) + 1)
+                compartment = compartments[root]
+                o_left = x > 0 and open_right[c - nbr_rows]
+                o_right = open_right[c]
+                o_up = y > 0 and open_down[c - 1]
+                o_down = open_down[c]
+                # a side with a wall starts at the wall's inside face (the max coordinate of the left / upper line,
+                #   the min coordinate of the right / lower line), an open side at the on-center coordinate
+                x1 = xc[3 * x + 1] if o_left else xc[3 * x + 2]
+                x2 = xc[3 * x + 4] if o_right else xc[3 * x + 3]
+                y1 = yc[3 * y + 1] if o_up else yc[3 * y + 2]
+                y2 = yc[3 * y + 4] if o_down else yc[3 * y + 3]
+                area = (x2 - x1) * (y2 - y1)
+                # the corners of the junctions at the nodes of the cell between 2 open sides
+                for o_x, o_y, nx, ny, dx, dy in (
+                    (o_left, o_up, x, y, xc[3 * x + 2] - xc[3 * x + 1], yc[3 * y + 2] - yc[3 * y + 1]),
+                    (o_right, o_up, x + 1, y, xc[3 * x + 4] - xc[3 * x + 3], yc[3 * y + 2] - yc[3 * y + 1]),
+                    (o_left, o_down, x, y + 1, xc[3 * x + 2] - xc[3 * x + 1], yc[3 * y + 4] - yc[3 * y + 3]),
+                    (o_right, o_down, x + 1, y + 1, xc[3 * x + 4] - xc[3 * x + 3], yc[3 * y + 4] - yc[3 * y + 3]),
+                ):
+                    if o_x and o_y and masks[nx * (nbr_rows + 1) + ny]:
+                        area -= dx * dy
+                compartment.cells.append((x, y))
+                compartment.boxes.extend((x1, y1, x2, y2))
+                compartment.area += area
+
+        to_mm = self.to_mm
+        for compartment in compartments.values():
+            boxes = compartment.boxes
+            compartment.width = to_mm(max(boxes[2::4]) - min(boxes[0::4]))
+            compartment.length = to_mm(max(boxes[3::4]) - min(boxes[1::4]))
+            compartment.volume = to_mm(to_mm(to_mm(compartment.area * self.depth_outer)))
+            compartment.area = to_mm(to_mm(compartment.area))
+        self.compartments = list(compartments.values())
+        return self.compartments
+
+    def get_spatial_index(self) -> SpatialIndex:
+        """
+        Get the spatial index of the wall slots (i.e., the walls) and the compartments, building it if needed.
+
+        :return:    the SpatialIndex object
+
+        the base slots (interior walls) and the exterior walls are added with the bounding box of the line between
+        their first and last intersections, widened by half the material thickness on both sides. The compartments
+        are added with the inside box of each of their cells (see get_compartments). The bucket size is the average
+        column width / row height.
+
+        the index is built once per layout: it is discarded when the walls are re-computed or the layout is updated
+        (see update_layout).
+        """
+        if self.spatial_index is None:
+            self.require("walls")
+            spacing = (self.col_offsets[-1] + self.row_offsets[-1]) / ((self.nbr_cols + self.nbr_rows) or 1)
+            spatial_index = SpatialIndex(spacing or 1)
+            half_mt = self.div(self.mat_thick, 2)
+            for wall_slot in self.base_slots + self.exterior_walls:
+                first_pt = wall_slot.intersections[0].intrxn
+                last_pt = wall_slot.intersections[-1].intrxn
+                spatial_index.add(
+                    wall_slot,
+                    min(first_pt.x, last_pt.x) - half_mt,
+                    min(first_pt.y, last_pt.y) - half_mt,
+                    max(first_pt.x, last_pt.x) + half_mt,
+                    max(first_pt.y, last_pt.y) + half_mt,
+                )
+            for compartment in self.get_compartments():
+                boxes = compartment.boxes
+                for n in range(0, len(boxes), 4):
+                    spatial_index.add(compartment, *boxes[n:n + 4])
+            self.spatial_index = spatial_index
+        return self.spatial_index
+
+    def hit_test(self, x: float, y: float, tolerance: float = 0.0) -> list:
+        """
+        Find the walls and compartments at an x, y position (in millimetres).
+
+        :param x:           the x coordinate
+        :param y:           the y coordinate
+        :param tolerance:   how far (in millimetres) the position may be from a wall or compartment
+        :return:            the WallSlot objects of the walls (from base_slots & exterior_walls) under the position,
+                            followed by the Compartment objects
+        """
+        return self.get_spatial_index().hit_test(self.to_units(x), self.to_units(y), self.to_units(tolerance))
+
+    def query_rect(self, x1: float, y1: float, x2: float, y2: float) -> list:
+        """
+        Find the walls and compartments that overlap a rectangle (in millimetres, x1 <= x2 and y1 <= y2).
+
+        :return:    the WallSlot objects of the walls (from base_slots & exterior_walls) that overlap the rectangle,
+                    followed by the Compartment objects
+        """
+        to_units = self.to_units
+        return self.get_spatial_index().query_rect(to_units(x1), to_units(y1), to_units(x2), to_units(y2))
+
+    def _locate_axis(self, offsets: array, coords: Iterable[float]) -> Tuple[List[int], List[Optional[int]]]:
+        # the on-center coordinate of a line is its offset plus half the material thickness, so the coordinates are
+        #   shifted by half the material thickness instead of shifting all the offsets
+        if offsets is None:
+            raise ValueError("the aggregate coordinates have not been calculated (see calc_agg_coords)")
+        half_mt = self.div(self.mat_thick, 2)
+        last = len(offsets) - 1
+        to_units = self.to_units
+        lines = []
+        cells = []
+        for coord in coords:
+            c = to_units(coord) - half_mt
+            # offsets[i - 1] <= c < offsets[i]
+            i = bisect_right(offsets, c)
+            if i == 0:
+                lines.append(0)
+                cells.append(None)
+            elif i > last:
+                lines.append(last)
+                cells.append(last - 1 if c == offsets[last] else None)
+            else:
+                lines.append(i if offsets[i] - c < c - offsets[i - 1] else i - 1)
+                cells.append(i - 1)
+        return lines, cells
+
+    def require(self, name: str) -> None:
+        """
+        Compute a stage (and the stages it depends on) if it has not been computed yet.
+
+        :param name:    the name of the stage, see Base.stages
+        """
+        if name not in self.stages_done:
+            getattr(self, self.stages[name][0])()
+
+    def invalidate(self, name: str) -> None:
+        """
+        Discard the results of a stage and of all the stages that depend on it.
+
+        :param name:    the name of the stage, see Base.stages
+        """
+        self.check_mutable()
+        for dependent in self.stages[name][1]:
+            self.invalidate(dependent)
+        if name == "dim_paths":
+            self.dim_paths = []
+            self.dim_point_seq = count(1)
+        elif name == "norm_paths":
+            self.norm_index_paths = []
+            self.norm_dim_paths = []
+        elif name == "path_walls":
+            self.path_index_walls = []
+        elif name == "walls":
+            self.compartments = None
+            self.part_lines = None
+            self.spatial_index = None
+            self.wall_seq = count(1)
+            self.base_slots = []
+            self.exterior_walls = []
+            for norm_dim_path in self.norm_dim_paths:
+                for dim_pt in norm_dim_path.path_points:
+                    dim_pt.intersections = []
+        self.x_deps.pop(name, None)
+        self.y_deps.pop(name, None)
+        self.stages_done.discard(name)
+
+    def track_point(
+        self, stage_name: str, point: Point, x_index: int, y_index: int, x_slot: int = 1, y_slot: int = 1
+    ) -> Point:
+        """
+        Record that a point's coordinates were taken from the given aggregate grid node (see update_col_width).
+
+        :param stage_name:  the stage that created the point
+        :param point:       the point to track
+        :param x_index:     the column index of the node
+        :param y_index:     the row index of the node
+        :param x_slot:      the x coordinate used: 0 = min, 1 = avg, 2 = max
+        :param y_slot:      the y coordinate used: 0 = min, 1 = avg, 2 = max
+        :return:            the point
+        """
+        if stage_name not in self.x_deps:
+            self.x_deps[stage_name] = [[] for _ in range(self.nbr_cols + 1)]
+            self.y_deps[stage_name] = [[] for _ in range(self.nbr_rows + 1)]
+        self.x_deps[stage_name][x_index].append((point, x_slot))
+        self.y_deps[stage_name][y_index].append((point, y_slot))
+        return point
+
+    def update_col_width(self, i: int, col_width: float) -> Dict[str, Set[int]]:
+        """
+        Change the width of a column and update the computed layout in place.
+
+        :param i:           the index of the column to change
+        :param col_width:   the new column width
+        :return:            the parts to re-render (see update_layout)
+        """
+        self.check_mutable()
+        self.col_widths = self.col_widths[:i] + [self.to_units(col_width)] + self.col_widths[i + 1:]
+        self.width = sum(self.col_widths) + self.mat_thick if self.on_center else 0
+        return self.update_layout("x", self.calc_offsets(self.col_widths, self.width))
+
+    def update_row_height(self, j: int, row_height: float) -> Dict[str, Set[int]]:
+        """
+        Change the height of a row and update the computed layout in place.
+
+        :param j:           the index of the row to change
+        :param row_height:  the new row height
+        :return:            the parts to re-render (see update_layout)
+        """
+        self.check_mutable()
+        self.row_heights = self.row_heights[:j] + [self.to_units(row_height)] + self.row_heights[j + 1:]
+        self.height = sum(self.row_heights) + self.mat_thick if self.on_center else 0
+        return self.update_layout("y", self.calc_offsets(self.row_heights, self.height))
+
+    def update_layout(self, axis: str, offsets: List[float]) -> Dict[str, Set[int]]:
+        """
+        Move the aggregate grid lines of one axis to the given offsets and update the points that depend on them.
+
+        :param axis:        x (columns) or y (rows)
+        :param offsets:     the new offsets of the column (row) lines
+        :return:            a dictionary with the indices of the parts to re-render, with the keys:
+                                - base_paths:   indices into norm_dim_paths (see gen_svg_base_path)
+                                - base_slots:   indices into base_slots (see gen_svg_base_slots)
+                                - inner_walls:  indices into base_slots (see gen_svg_inner_walls)
+                                - outer_walls:  indices into the DimPoints of all the norm_dim_paths, in order
+                                                (see gen_svg_outer_walls)
+
+        only the points (DimPoint & intersection coordinates) taken from a moved line are updated, calc_dim_paths,
+        normalize_paths, create_path_walls & proc_walls do not have to be called again. The order of the
+        intersections in the wall slots does not change as the lines cannot pass each other.
+
+        the base paths & base slots are drawn at their absolute coordinates, so they need to be re-rendered when
+        any of their points moved. The inner and outer walls are drawn relative to their own starting point, so
+        they only need to be re-rendered when the distances between their points change (i.e., not all of their
+        points moved together). The inner & outer walls are placed below the base, so when the height of the
+        base changes, all of them have to be re-rendered.
+        """
+        shifts = self.agg_coords.update(axis, offsets)
+        self.compartments = None
+        self.spatial_index = None
+        if axis == "x":
+            self.col_offsets[:] = array(self.col_offsets.typecode, offsets)
+            coord = self.agg_coords.x
+            for deps in self.x_deps.values():
+                for line, shift in enumerate(shifts):
+                    if shift:
+                        for point, slot in deps[line]:
+                            point.x = coord(3 * line + slot)
+        else:
+            self.row_offsets[:] = array(self.row_offsets.typecode, offsets)
+            coord = self.agg_coords.y
+            for deps in self.y_deps.values():
+                for line, shift in enumerate(shifts):
+                    if shift:
+                        for point, slot in deps[line]:
+                            point.y = coord(3 * line + slot)
+
+        dirty: Dict[str, Set[int]] = {"base_paths": set(), "base_slots": set(), "inner_walls": set(), "outer_walls": set()}
+        if not any(shifts):
+            return dirty
+
+        # moved[l] & changed[l] count the lines up to l that moved & whose shift differs from the previous line's,
+        #   so a part whose lines lie between 2 lines without a count difference is tested in constant time and
+        #   only the parts that straddle a moved line or a change of shift have their lines scanned
+        moved = list(accumulate(1 if shift else 0 for shift in shifts))
+        changed = list(accumulate(int(line > 0 and shift != shifts[line - 1]) for line, shift in enumerate(shifts)))
+
+        def any_moved(lines: Tuple[int, ...]) -> bool:
+            first, last = lines[0], lines[-1]
+            if moved[last] == moved[first] and not shifts[first]:
+                return False
+            return bool(shifts[first] or shifts[last]) or any(shifts[line] for line in lines)
+
+        # a part changes shape when the lines its points are on moved by different amounts
+
+        def reshaped(lines: Tuple[int, ...]) -> bool:
+            first, last = lines[0], lines[-1]
+            if changed[last] == changed[first]:
+                return False
+            shift = shifts[first]
+            return any(shifts[line] != shift for line in lines)
+
+        part_lines = self.get_part_lines()
+        ndx = 0 if axis == "x" else 1
+        for p, lines in enumerate(part_lines["base_paths"]):
+            if any_moved(lines[ndx]):
+                dirty["base_paths"].add(p)
+        for s, lines in enumerate(part_lines["base_slots"]):
+            if any_moved(lines[ndx]):
+                dirty["base_slots"].add(s)
+            if reshaped(lines[ndx]):
+                dirty["inner_walls"].add(s)
+        for w, lines in enumerate(part_lines["outer_walls"]):
+            if reshaped(lines[ndx]):
+                dirty["outer_walls"].add(w)
+        if axis == "y":
+            dirty["inner_walls"] = set(range(len(part_lines["base_slots"])))
+            dirty["outer_walls"] = set(range(len(part_lines["outer_walls"])))
+        return dirty
+
+    def get_part_lines(self) -> Dict[str, List[Tuple[Tuple[int, ...], Tuple[int, ...]]]]:
+        """
+        Get the grid lines of the parts, building them if needed: for each base path, base slot and outer wall
+        (i.e., each DimPoint of the norm_dim_paths, in order), the sorted column lines & row lines its points are
+        on.
+
+        the lines only depend on the paths & walls, not on the column widths & row heights, so they are kept
+        until the walls are re-computed.
+        """
+        if self.part_lines is None:
+            self.require("walls")
+
+            def lines(gxys: Iterable[Tuple[int, int]]) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+                gxys = list(gxys)
+                return tuple(sorted({gx for gx, _ in gxys})), tuple(sorted({gy for _, gy in gxys}))
+
+            outer_walls = []
+            for n_dim_path in self.norm_dim_paths:
+                for dim_pt in n_dim_path.path_points:
+                    gxys = [dim_pt.index_point.gxy, dim_pt.next_dim_pt().index_point.gxy]
+                    gxys.extend(intrxn.gxy for intrxn in dim_pt.intersections)
+                    outer_walls.append(lines(gxys))
+            self.part_lines = {
+                "base_paths": [
+                    lines(i_pt.gxy for i_pt in n_i_path.index_points) for n_i_path in self.norm_index_paths
+                ],
+                "base_slots": [lines(intrxn.gxy for intrxn in bslot.intersections) for bslot in self.base_slots],
+                "outer_walls": outer_walls,
+            }
+        return self.part_lines
+
+    @stage("dim_paths")
+    def calc_dim_paths(self):
+        # TODO: !!! see if we could refactor the bulk of the functionality (i.e., the code in the for loop)
+        #   in this method into the DimPath add() method. This would allow the add method to be more independent
+        #   and more usable by other functions (if necessary). That is if we needed to create DimPath objects from
+        #   other lists than just the list used to hold the BASE object's points.
+        for i_path in self.index_paths:
+
+            # determine the orientation for the path by using the first 3 points of the path
+            path_ori = i_path.orientation
+
+            # loop over each point in the path with its corresponding prev and next points
+            dim_path = DimPath(path_ori, self.dim_point_seq)
+            for prev_i_point, curr_i_point, next_i_point in cyclic_n_tuples(i_path.index_points, 3, -1):
+
+                # get the avg aggregate (on center) point for the p, c & n ndx pts
+                prev_pt = self.get_avg_agg_point(prev_i_point)
+                curr_pt = self.get_avg_agg_point(curr_i_point)
+                next_pt = self.get_avg_agg_point(next_i_point)
+
+                # get the directions (going left, right, up or down) of the previous and current lines
+                #   from the p, c & n ndx pts
+                prev_dire = seg_direction(prev_pt.x, prev_pt.y, curr_pt.x, curr_pt.y)
+                curr_dire = seg_direction(curr_pt.x, curr_pt.y, next_pt.x, next_pt.y)
+
+                # determine outside & inside dimensional points based on the:
+                #   previous line direction
+                #   current line direction
+                #   and path orientation
+                outside_pt_nbr, inside_pt_nbr = Base.dim(prev_dire, curr_dire, path_ori)
+                outside_dim, inside_dim = self.get_dims_from_agg_points(
+                    curr_i_point, outside_pt_nbr, inside_pt_nbr
+                )
+                x_index, y_index = curr_i_point.gxy
+                self.track_point("dim_paths", outside_dim, x_index, y_index, *AggregateGrid.pt_slots[outside_pt_nbr])
+                self.track_point("dim_paths", curr_pt, x_index, y_index)
+                self.track_point("dim_paths", inside_dim, x_index, y_index, *AggregateGrid.pt_slots[inside_pt_nbr])
+                new_dim_point = dim_path.add(
+                    direction=curr_dire,
+                    line_type=curr_i_point.line_type,
                     outside_pt=outside_dim,
                     on_center_pt=curr_pt,
                     inside_pt=inside_dim,
@@ -992,43 +3247,83 @@ class Base:
             dim_path.set_wrap()
             self.dim_paths.append(dim_path)
 
-    def orientation(self, i_path):
-        # notes:
-        #   - it takes at a minimum 3 points to form a polygon
-        #   - (at least) 3 of the points must not be collinear
-        #       that is 3 collinear points would form a line not a polygon
-        #   - that being said, we will try 3 points, incrementally until we get an orientation of non-collinear
-        #   - but if all the points in the path do form a straight line (and not a polygon) we could, in theory
-        #       go past the end of the list (out of bounds exception) unless we code for that condition
-        #   - and if the path does not contain at least 3 points, the for loop will NOT execute at all
-
-        if len(i_path.index_points) < 3:
+    def orientation(self, i_path: IndexPath) -> str:
+        return self.validate_path(i_path)
+
+    def validate_path(self, i_path: IndexPath) -> str:
+        """
+        Validates an index path and determines its orientation in a single pass over its points.
+
+        :param i_path:  the index path to validate
+        :return:        the orientation of the path: cw (clock wise) or ccw (counter clock wise)
+
+        the path is implicitly closed (i.e., the last point is connected back to the first point) and the
+        following is checked for every line of the path, including the closing line:
+            - both points lie within the column / row grid
+            - the line is horizontal or vertical (the points share a column or a row)
+            - the line is not zero length (the points are not the same)
+            - the line does not reverse the direction of the previous line (e.g., left followed by right)
+
+        the orientation is determined from the sign of the path's signed area, calculated with the shoelace formula
+        on the column / row indices, i.e., the sum of (x1 * y2 - x2 * y1) over all the lines of the path. The
+        indices map to x, y coordinates that increase with the index, so the sign is the same as for the real
+        coordinates. As the y-axis points down (quadrant 4), a positive area is clock wise.
+
+        notes:
+            - it takes at a minimum 3 points to form a polygon
+            - if all the points are collinear, the area is zero and the path does not form a polygon
+        """
+        i_points = i_path.index_points
+        if len(i_points) < 3:
             raise ValueError(
                 f"could not determine the path's orientation (clock wise or counter clock wise). "
-                f"please check that you have 3 or more points in your path. Path len: {len(i_path.index_points)}"
+                f"please check that you have 3 or more points in your path. Path len: {len(i_points)}"
             )
 
-        path_ori = None
-        for i in range(len(i_path.index_points) - 2):
-            i_pt_1 = i_path.index_points[i]
-            pt_1 = self.get_avg_agg_point(i_pt_1)
-            i_pt_2 = i_path.index_points[i + 1]
-            pt_2 = self.get_avg_agg_point(i_pt_2)
-            i_pt_3 = i_path.index_points[i + 2]
-            pt_3 = self.get_avg_agg_point(i_pt_3)
-            path_ori = pt_1.orientation(pt_2, pt_3)
-            if path_ori != "col":
-                break
-
-        if path_ori == "col":
+        area = 0
+        prev_dx = prev_dy = 0
+        for n, (curr_i_pt, next_i_pt) in enumerate(cyclic_n_tuples(i_points, 2, 0)):
+            x1, y1 = curr_i_pt.gxy
+            x2, y2 = next_i_pt.gxy
+            if not (0 <= x1 <= self.nbr_cols and 0 <= y1 <= self.nbr_rows):
+                raise ValueError(
+                    f"path point #{n} {curr_i_pt} is outside of the {self.nbr_cols} x {self.nbr_rows} grid"
+                )
+            dx = (x2 > x1) - (x2 < x1)
+            dy = (y2 > y1) - (y2 < y1)
+            if dx and dy:
+                if n == len(i_points) - 1:
+                    raise ValueError(
+                        f"the path does not close: the last point {curr_i_pt} and the first point {next_i_pt} "
+                        f"are not on the same column or row"
+                    )
+                raise ValueError(
+                    f"the line from path point #{n} {curr_i_pt} to #{n + 1} {next_i_pt} must be horizontal or vertical"
+                )
+            if not dx and not dy:
+                if n == len(i_points) - 1:
+                    raise ValueError(
+                        f"the last point {curr_i_pt} repeats the first point, end_path closes the path automatically"
+                    )
+                raise ValueError(f"the line from path point #{n} {curr_i_pt} to #{n + 1} {next_i_pt} has zero length")
+            if dx == -prev_dx and dy == -prev_dy:
+                raise ValueError(f"the path reverses its direction at path point #{n} {curr_i_pt}")
+            prev_dx, prev_dy = dx, dy
+            area += x1 * y2 - x2 * y1
+
+        # the first line is checked against the closing line for a reversal of direction
+        x1, y1 = i_points[0].gxy
+        x2, y2 = i_points[1].gxy
+        if (x2 > x1) - (x2 < x1) == -prev_dx and (y2 > y1) - (y2 < y1) == -prev_dy:
+            raise ValueError(f"the path reverses its direction at path point #0 {i_points[0]}")
+
+        if not area:
             raise ValueError(
                 "could not determine the path's orientation (clock wise or counter clock wise). "
                 "please check that all points in the path are not collinear"
             )
-        if path_ori is None:
-            raise ValueError("exhausted path without determining the orientation")
 
-        return path_ori
+        return "cw" if area > 0 else "ccw"
 
     def calc_min(self, tot_len: float) -> (int, int, float):
         """
@@ -1039,28 +3334,45 @@ class Base:
                             number of fingers in the finger joint edge
                             number of spaces in the finger joint edge
                             the calculated beginning / ending length
+
+        the plan is looked up in the joint plan of the base (see JointPlan).
         """
         # TODO: look at where we're using integer division
         #   and see how we could maybe introduce a fractional precision
         #   into the calculation
 
         # TODO: is the use case of 1 finger and 0 spaces valid? YES I THINK IT IS
-        max_fs = tot_len - ((self.mat_thick + self.min_be_len) * 2)
-        n1 = max_fs + self.spc_len
-        n2 = self.fngr_len + self.spc_len
-        nbr_of_fngrs = int(n1 // n2)
-        nbr_of_spcs = nbr_of_fngrs - 1
-        tot_fngr_len = nbr_of_fngrs * self.fngr_len
-        tot_spc_len = nbr_of_spcs * self.spc_len
-        be_len = self.min_be_len + ((max_fs - tot_fngr_len - tot_spc_len) / 2)
+        return self.get_joint_plan().fingers(tot_len)
 
-        return nbr_of_fngrs, nbr_of_spcs, be_len
+    def get_joint_plan(self) -> JointPlan:
+        """
+        Get the joint plan of the base, creating it if needed with the plans of all the finger joint edges (the
+        lines of the normalized paths and the sides of the outer walls) and all the spans of the base slots.
 
+        :return:    the JointPlan object
+        """
+        if self.joint_plan is None:
+            self.joint_plan = JointPlan(self.mat_thick, self.joints, self.fixed_point)
+            edge_lens = [self.depth_outer + self.mat_thick]
+            span_lens = []
+            if "norm_paths" in self.stages_done:
+                for norm_dim_path in self.norm_dim_paths:
+                    for curr_dim_pt in norm_dim_path.path_points:
+                        edge_lens.append(curr_dim_pt.outer_line_length(curr_dim_pt.get_next_start()))
+            if "walls" in self.stages_done:
+                for bslot in self.base_slots:
+                    for intrxn_1, intrxn_2 in fwd_pair(bslot.intersections):
+                        pt1, pt2 = intrxn_1.intrxn, intrxn_2.intrxn
+                        span_lens.append(seg_length(pt1.x, pt1.y, pt2.x, pt2.y))
+            self.joint_plan.add(edge_lens, span_lens)
+        return self.joint_plan
+
+    @stage("norm_paths", "dim_paths")
     def normalize_paths(self):
         for dim_path in self.dim_paths:
             starting_point = None
             norm_index_path = IndexPath(orientation=dim_path.path_ori)
-            norm_dim_path = DimPath(dim_path.path_ori)
+            norm_dim_path = DimPath(dim_path.path_ori, self.dim_point_seq)
             curr_point = dim_path.path_points[0].get_prev_end().next_dim_pt()
 
             while curr_point != starting_point:
@@ -1090,19 +3402,36 @@ class Base:
             self.norm_index_paths.append(norm_index_path)
             self.norm_dim_paths.append(norm_dim_path)
 
-    def gen_svg_outer_walls(self, vert_os):
-        extra_space = 20
+    def gen_svg_outer_walls(self, vert_os, parts: Optional[Set[int]] = None):
+        print("\n".join(" ".join(cmd_buf.svg_cmds(self.mm)) for cmd_buf in self.outer_wall_parts(vert_os, parts)))
+
+    def outer_wall_parts(self, vert_os, parts: Optional[Set[int]] = None) -> Iterator[CommandBuffer]:
+        """
+        Generate the path commands of the outer walls, one part (i.e., one line of the normalized paths) at a time.
+
+        :param vert_os:     the y position of the bottom of the first outer wall
+        :param parts:       the numbers of the parts to generate, None for all the parts
+        :return:            an iterator of the command buffers
+        """
+        self.require("walls")
+        extra_space = self.to_units(20)
         horz_os = extra_space
         inc_vos = self.depth_outer + self.mat_thick + extra_space
 
-        vtab_len = (self.depth_outer - (3 * self.wall_tbslt_dist)) / 2
+        vtab_len = self.div(self.depth_outer - (3 * self.wall_tbslt_dist), 2)
         y_side_a = vert_os
 
-        svg_paths = []
+        part = -1
         for norm_dim_path in self.norm_dim_paths:
             for curr_dim_pt in norm_dim_path.path_points:
+                # if only some of the parts are to be rendered (see update_layout), skip the others
+                part += 1
+                if parts is not None and part not in parts:
+                    y_side_a += inc_vos
+                    continue
+
                 next_dim_pt = curr_dim_pt.next_dim_pt()         # only used to get the ho_len
-                svg_cmds = []
+                cmd_buf = self.command_buffer()
 
                 #
                 # bottom
@@ -1112,36 +3441,26 @@ class Base:
 
                 # bottom left margin for vertical finger/space joint
                 if curr_dim_pt.dire() in ("left", "right"):
-                    svg_cmds.append(f"M {horz_os} {y_side_a}")
-                    svg_cmds.append(f"V {y_side_a + self.mat_thick}")
-                    svg_cmds.append(f"H {horz_os + self.mat_thick}")
+                    cmd_buf.move(horz_os, y_side_a)
+                    cmd_buf.vert(y_side_a + self.mat_thick)
+                    cmd_buf.horz(horz_os + self.mat_thick)
                 else:
-                    svg_cmds.append(f"M {horz_os + self.mat_thick} {y_side_a}")
-                    svg_cmds.append(f"V {y_side_a + self.mat_thick}")
+                    cmd_buf.move(horz_os + self.mat_thick, y_side_a)
+                    cmd_buf.vert(y_side_a + self.mat_thick)
 
                 # bottom left beginning length
                 x = horz_os + self.mat_thick + be_len
-                svg_cmds.append(f"H {x}")
-                svg_cmds.append(f"V {y_side_a}")
-
-                # bottom finger & spaces (repeated)
-                for _ in range(nbr_of_spcs):
-                    x += self.fngr_len
-                    svg_cmds.append(f"H {x}")
-                    svg_cmds.append(f"V {y_side_a + self.mat_thick}")
-                    x += self.spc_len
-                    svg_cmds.append(f"H {x}")
-                    svg_cmds.append(f"V {y_side_a}")
-
-                # finish with the last bottom right finger (1 more than spaces)
-                x += self.fngr_len
-                svg_cmds.append(f"H {x}")
-                svg_cmds.append(f"V {y_side_a + self.mat_thick}")
+                cmd_buf.horz(x)
+
+                # bottom finger & spaces (repeated), finishing with the last bottom right finger (1 more than spaces)
+                x = cmd_buf.fingers(
+                    "H", x, 1, self.fngr_len, self.spc_len, nbr_of_spcs, y_side_a, y_side_a + self.mat_thick
+                )
 
                 # bottom right ending length
                 x += be_len
-                svg_cmds.append(f"H {x}")
-                # svg_cmds.append("\n\n")
+                cmd_buf.horz(x)
+                # cmd_buf.append("\n\n")
 
                 #
                 # Right side
@@ -1155,7 +3474,7 @@ class Base:
                     # horz walls start at the right outer edge,
                     #   vert walls start at the right inner edge
                     x += self.mat_thick
-                    svg_cmds.append(f"H {x}")
+                    cmd_buf.horz(x)
                     x_side_2_a = x
                     x_side_2_b = x - self.mat_thick
                 else:
@@ -1164,29 +3483,20 @@ class Base:
 
                 # right side lower material thickness and beginning length
                 y = y_side_a
-                svg_cmds.append(f"V {y}")
+                cmd_buf.vert(y)
                 y = y_side_a - be_len
-                svg_cmds.append(f"V {y}")
-
-                # right side finger & spaces (repeated)
-                for _ in range(nbr_of_spcs):
-                    svg_cmds.append(f"H {x_side_2_b}")
-                    y -= self.fngr_len
-                    svg_cmds.append(f"V {y}")
-                    svg_cmds.append(f"H {x_side_2_a}")
-                    y -= self.spc_len
-                    svg_cmds.append(f"V {y}")
-
-                # finish with the last upper right finger (1 more than spaces)
-                svg_cmds.append(f"H {x_side_2_b}")
-                y -= self.fngr_len
-                svg_cmds.append(f"V {y}")
-                svg_cmds.append(f"H {x_side_2_a}")
+                cmd_buf.vert(y)
+
+                # right side finger & spaces (repeated), finishing with the last upper right finger
+                #   (1 more than spaces)
+                y = cmd_buf.fingers(
+                    "V", y, -1, self.fngr_len, self.spc_len, nbr_of_spcs, x_side_2_b, x_side_2_a
+                )
 
                 # upper right ending length and material thickness
                 y -= (be_len + self.mat_thick)
-                svg_cmds.append(f"V {y}")
-                # svg_cmds.append("\n\n")
+                cmd_buf.vert(y)
+                # cmd_buf.append("\n\n")
 
                 x -= ho_len
                 if curr_dim_pt.dire() in ("left", "right"):
@@ -1196,72 +3506,83 @@ class Base:
                     x += (self.mat_thick * 2)
                     x_side_2_a = x
                     x_side_2_b = x_side_2_a - self.mat_thick
-                svg_cmds.append(f"H {x}")
+                cmd_buf.horz(x)
 
                 y += (be_len + self.mat_thick)
-                svg_cmds.append(f"V {y}")
-
-                for _ in range(nbr_of_spcs):
-                    svg_cmds.append(f"H {x_side_2_b}")
-                    y += self.fngr_len
-                    svg_cmds.append(f"V {y}")
-                    svg_cmds.append(f"H {x_side_2_a}")
-                    y += self.spc_len
-                    svg_cmds.append(f"V {y}")
+                cmd_buf.vert(y)
 
-                svg_cmds.append(f"H {x_side_2_b}")
-                y += self.fngr_len
-                svg_cmds.append(f"V {y}")
-                svg_cmds.append(f"H {x_side_2_a}")
+                y = cmd_buf.fingers(
+                    "V", y, 1, self.fngr_len, self.spc_len, nbr_of_spcs, x_side_2_b, x_side_2_a
+                )
 
                 y += be_len
-                svg_cmds.append(f"V {y}")
+                cmd_buf.vert(y)
                 y += self.mat_thick
-                svg_cmds.append(f"V {y}")
+                cmd_buf.vert(y)
 
-                svg_cmds.append("Z")
+                cmd_buf.close()
 
                 if curr_dim_pt.intersections:
                     for intrxn in curr_dim_pt.intersections:
-                        oc_len = Line(curr_dim_pt.on_center_pt, intrxn.intrxn).length()
+                        oc_pt, x_pt = curr_dim_pt.on_center_pt, intrxn.intrxn
+                        oc_len = seg_length(oc_pt.x, oc_pt.y, x_pt.x, x_pt.y)
                         # bottom tab
-                        svg_cmds.append(f"M {horz_os + oc_len} {y_side_a - self.wall_tbslt_dist}")
-                        svg_cmds.append(f"H {horz_os + oc_len + self.mat_thick}")
-                        svg_cmds.append(f"V {y_side_a - self.wall_tbslt_dist - vtab_len}")
-                        svg_cmds.append(f"H {horz_os + oc_len}")
-                        svg_cmds.append("Z")
+                        cmd_buf.move(horz_os + oc_len, y_side_a - self.wall_tbslt_dist)
+                        cmd_buf.horz(horz_os + oc_len + self.mat_thick)
+                        cmd_buf.vert(y_side_a - self.wall_tbslt_dist - vtab_len)
+                        cmd_buf.horz(horz_os + oc_len)
+                        cmd_buf.close()
                         # top tab
-                        svg_cmds.append(f"M {horz_os + oc_len} {y_side_a - self.wall_tbslt_dist - self.wall_tbslt_dist - vtab_len}")
-                        svg_cmds.append(f"H {horz_os + oc_len + self.mat_thick}")
-                        svg_cmds.append(f"V {y_side_a - self.wall_tbslt_dist - self.wall_tbslt_dist - vtab_len - vtab_len}")
-                        svg_cmds.append(f"H {horz_os + oc_len}")
-                        svg_cmds.append("Z")
+                        cmd_buf.move(horz_os + oc_len, y_side_a - self.wall_tbslt_dist - self.wall_tbslt_dist - vtab_len)
+                        cmd_buf.horz(horz_os + oc_len + self.mat_thick)
+                        cmd_buf.vert(y_side_a - self.wall_tbslt_dist - self.wall_tbslt_dist - vtab_len - vtab_len)
+                        cmd_buf.horz(horz_os + oc_len)
+                        cmd_buf.close()
 
-                svg_path = " ".join(svg_cmds)
-                svg_paths.append(svg_path)
+                yield cmd_buf
 
                 y_side_a += inc_vos
 
-            outter_walls = "\n".join(svg_paths)
-            print(outter_walls)
+    def gen_svg_inner_walls(self, parts: Optional[Set[int]] = None):
+        print("\n".join(" ".join(cmd_buf.svg_cmds(self.mm)) for cmd_buf in self.inner_wall_parts(parts)))
+        return self.inner_walls_end()
+
+    def inner_walls_end(self) -> float:
+        """
+        Get the y position below the inner walls, i.e., the vert_os to generate the outer walls with.
+        """
+        extra_space = self.to_units(20)
+        inc_vos = self.depth_outer + self.mat_thick + extra_space
+        return self.height + extra_space + self.depth_outer + len(self.base_slots) * inc_vos
 
+    def inner_wall_parts(self, parts: Optional[Set[int]] = None) -> Iterator[CommandBuffer]:
+        """
+        Generate the path commands of the inner walls, one part (i.e., one base slot) at a time.
 
-    def gen_svg_inner_walls(self):
-        extra_space = 20
+        :param parts:       the numbers of the parts to generate, None for all the parts
+        :return:            an iterator of the command buffers
+        """
+        self.require("walls")
+        extra_space = self.to_units(20)
         horz_os = extra_space
         vert_os = self.height + extra_space
         inc_vos = self.depth_outer + self.mat_thick + extra_space
 
-        vtab_len = (self.depth_outer - (3 * self.wall_tbslt_dist)) / 2
+        vtab_len = self.div(self.depth_outer - (3 * self.wall_tbslt_dist), 2)
         y_side_a = vert_os + self.depth_outer
         x_side_1_b = horz_os
         x_side_1_a = horz_os + self.mat_thick
-        cross_slot_len = self.depth_outer / 2
+        cross_slot_len = self.div(self.depth_outer, 2)
+
+        for part, bslot in enumerate(self.base_slots):
+            # if only some of the parts are to be rendered (see update_layout), skip the others
+            if parts is not None and part not in parts:
+                y_side_a += inc_vos
+                continue
 
-        svg_paths = []
-        for bslot in self.base_slots:
-            svg_cmds = []
-            c_to_c_len = Line(bslot.intersections[0].intrxn, bslot.intersections[-1].intrxn).length()
+            cmd_buf = self.command_buffer()
+            first_pt, last_pt = bslot.intersections[0].intrxn, bslot.intersections[-1].intrxn
+            c_to_c_len = seg_length(first_pt.x, first_pt.y, last_pt.x, last_pt.y)
 
             # y_side_a gets initialized before the outer for loop and gets incremented
             #   at the end of the outer for loop
@@ -1279,45 +3600,49 @@ class Base:
             x_top = x_side_2_a
 
             # side 2
-            svg_cmds.append(f"M {x_side_2_a} {y_side_a}")
-            svg_cmds.append(f"V {y_side_b}")
-            svg_cmds.append(f"H {x_side_2_b}")
-            svg_cmds.append(f"V {y_side_c}")
-            svg_cmds.append(f"H {x_side_2_a}")
-            svg_cmds.append(f"V {y_side_d}")
-            svg_cmds.append(f"H {x_side_2_b}")
-            svg_cmds.append(f"V {y_side_e}")
-            svg_cmds.append(f"H {x_side_2_a}")
-            svg_cmds.append(f"V {y_side_f}")
+            cmd_buf.move(x_side_2_a, y_side_a)
+            cmd_buf.vert(y_side_b)
+            cmd_buf.horz(x_side_2_b)
+            cmd_buf.vert(y_side_c)
+            cmd_buf.horz(x_side_2_a)
+            cmd_buf.vert(y_side_d)
+            cmd_buf.horz(x_side_2_b)
+            cmd_buf.vert(y_side_e)
+            cmd_buf.horz(x_side_2_a)
+            cmd_buf.vert(y_side_f)
 
             # top
             for intrxn_1, intrxn_2 in rev_pair(bslot.intersections[1:]):
-                span_len = Line(intrxn_1.intrxn, intrxn_2.intrxn).length()
+                span_len = seg_length(
+                    intrxn_1.intrxn.x, intrxn_1.intrxn.y, intrxn_2.intrxn.x, intrxn_2.intrxn.y
+                )
                 x_top -= span_len
                 if intrxn_1.x_type == "cross" and bslot.type == "vert":
-                    svg_cmds.append(f"H {x_top + self.mat_thick}")
-                    svg_cmds.append(f"V {y_side_f + cross_slot_len}")
-                    svg_cmds.append(f"H {x_top}")
-                    svg_cmds.append(f"V {y_side_f}")
+                    cmd_buf.horz(x_top + self.mat_thick)
+                    cmd_buf.vert(y_side_f + cross_slot_len)
+                    cmd_buf.horz(x_top)
+                    cmd_buf.vert(y_side_f)
                 else:
-                    svg_cmds.append(f"H {x_top}")
-            svg_cmds.append(f"H {x_side_1_a}")
+                    cmd_buf.horz(x_top)
+            cmd_buf.horz(x_side_1_a)
 
             # side 1
-            svg_cmds.append(f"V {y_side_e}")
-            svg_cmds.append(f"H {x_side_1_b}")
-            svg_cmds.append(f"V {y_side_d}")
-            svg_cmds.append(f"H {x_side_1_a}")
-            svg_cmds.append(f"V {y_side_c}")
-            svg_cmds.append(f"H {x_side_1_b}")
-            svg_cmds.append(f"V {y_side_b}")
-            svg_cmds.append(f"H {x_side_1_a}")
-            svg_cmds.append(f"V {y_side_a}")
+            cmd_buf.vert(y_side_e)
+            cmd_buf.horz(x_side_1_b)
+            cmd_buf.vert(y_side_d)
+            cmd_buf.horz(x_side_1_a)
+            cmd_buf.vert(y_side_c)
+            cmd_buf.horz(x_side_1_b)
+            cmd_buf.vert(y_side_b)
+            cmd_buf.horz(x_side_1_a)
+            cmd_buf.vert(y_side_a)
 
             # bottom
             for intrxn_1, intrxn_2 in fwd_pair(bslot.intersections):
                 tbslt_len, n = self.calc_tbslt_len(intrxn_1.intrxn, intrxn_2.intrxn)
-                span_len = Line(intrxn_1.intrxn, intrxn_2.intrxn).length()
+                span_len = seg_length(
+                    intrxn_1.intrxn.x, intrxn_1.intrxn.y, intrxn_2.intrxn.x, intrxn_2.intrxn.y
+                )
                 x_bottom_a = x_bottom + self.wall_tbslt_dist
                 x_bottom_b = x_bottom_a + tbslt_len
 
@@ -1325,57 +3650,65 @@ class Base:
                     x_cross_a = x_bottom - self.mat_thick
                     x_cross_b = x_cross_a + self.mat_thick
                     y_cross = y_bottom_a - cross_slot_len
-                    svg_cmds.append(f"H {x_cross_a}")
-                    svg_cmds.append(f"V {y_cross}")
-                    svg_cmds.append(f"H {x_cross_b}")
-                    svg_cmds.append(f"V {y_bottom_a}")
+                    cmd_buf.horz(x_cross_a)
+                    cmd_buf.vert(y_cross)
+                    cmd_buf.horz(x_cross_b)
+                    cmd_buf.vert(y_bottom_a)
 
                 for i in range(n):
-                    svg_cmds.append(f"H {x_bottom_a}")
-                    svg_cmds.append(f"V {y_bottom_b}")
-                    svg_cmds.append(f"H {x_bottom_b}")
-                    svg_cmds.append(f"V {y_bottom_a}")
+                    cmd_buf.horz(x_bottom_a)
+                    cmd_buf.vert(y_bottom_b)
+                    cmd_buf.horz(x_bottom_b)
+                    cmd_buf.vert(y_bottom_a)
                     x_bottom_a = x_bottom_b + (self.wall_tbslt_dist * 2) + self.mat_thick
                     x_bottom_b = x_bottom_a + tbslt_len
                 x_bottom += span_len
-            svg_cmds.append("Z")
+            cmd_buf.close()
 
             # slots for Tee intersections
             x_slot =  x_side_1_a
             for intrxn_1, intrxn_2 in fwd_pair(bslot.intersections[:-1]):
-                span_len = Line(intrxn_1.intrxn, intrxn_2.intrxn).length()
+                span_len = seg_length(
+                    intrxn_1.intrxn.x, intrxn_1.intrxn.y, intrxn_2.intrxn.x, intrxn_2.intrxn.y
+                )
                 x_slot += span_len
                 if intrxn_2.x_type == "tee":
                     # bottom slot
-                    svg_cmds.append(f"M {x_slot} {y_side_b}")
-                    svg_cmds.append(f"H {x_slot - self.mat_thick}")
-                    svg_cmds.append(f"V {y_side_c}")
-                    svg_cmds.append(f"H {x_slot}")
-                    svg_cmds.append("Z")
+                    cmd_buf.move(x_slot, y_side_b)
+                    cmd_buf.horz(x_slot - self.mat_thick)
+                    cmd_buf.vert(y_side_c)
+                    cmd_buf.horz(x_slot)
+                    cmd_buf.close()
                     # top slot
-                    svg_cmds.append(f"M {x_slot} {y_side_d}")
-                    svg_cmds.append(f"H {x_slot - self.mat_thick}")
-                    svg_cmds.append(f"V {y_side_e}")
-                    svg_cmds.append(f"H {x_slot}")
-                    svg_cmds.append("Z")
+                    cmd_buf.move(x_slot, y_side_d)
+                    cmd_buf.horz(x_slot - self.mat_thick)
+                    cmd_buf.vert(y_side_e)
+                    cmd_buf.horz(x_slot)
+                    cmd_buf.close()
 
-            svg_path = " ".join(svg_cmds)
-            svg_paths.append(svg_path)
+            yield cmd_buf
 
             y_side_a += inc_vos
 
-        inner_walls = "\n".join(svg_paths)
-        print(inner_walls)
+    def gen_svg_base_slots(self, parts: Optional[Set[int]] = None):
+        print("\n".join(" ".join(cmd_buf.svg_cmds(self.mm)) for cmd_buf in self.base_slot_parts(parts)))
 
-        return y_side_a
+    def base_slot_parts(self, parts: Optional[Set[int]] = None) -> Iterator[CommandBuffer]:
+        """
+        Generate the path commands of the slots in the base, one slot at a time.
 
-    def gen_svg_base_slots(self):
-        svg_paths = []
-        half_mt = self.mat_thick * 0.5
+        :param parts:       the numbers of the parts (i.e., the base slots) to generate, None for all the parts
+        :return:            an iterator of the command buffers
+        """
+        self.require("walls")
+        half_mt = self.div(self.mat_thick, 2)
         first_dist = half_mt + self.wall_tbslt_dist
         norm_dist = self.mat_thick + (2 * self.wall_tbslt_dist)
         # print(f"### mat think: {self.mat_thick}, wall slot dist: {self.wall_tbslt_dist}")
-        for bslot in self.base_slots:
+        for part, bslot in enumerate(self.base_slots):
+            # if only some of the parts are to be rendered (see update_layout), skip the others
+            if parts is not None and part not in parts:
+                continue
             for intrxn_1, intrxn_2 in fwd_pair(bslot.intersections):
                 tbslt_len, n = self.calc_tbslt_len(intrxn_1.intrxn, intrxn_2.intrxn)
                 if bslot.type == "horz":
@@ -1390,34 +3723,233 @@ class Base:
                     y2 = y1 + tbslt_len
 
                 for i in range(n):
-                    svg_cmds = []
-                    svg_cmds.append(f"M {x1} {y1}")
+                    cmd_buf = self.command_buffer()
+                    cmd_buf.move(x1, y1)
                     if bslot.type == "horz":
-                        svg_cmds.append(f"H {x2}")
-                        svg_cmds.append(f"V {y2}")
-                        svg_cmds.append(f"H {x1}")
+                        cmd_buf.horz(x2)
+                        cmd_buf.vert(y2)
+                        cmd_buf.horz(x1)
                         x1 = x2 + norm_dist
                         x2 = x1 + tbslt_len
                     else:
-                        svg_cmds.append(f"V {y2}")
-                        svg_cmds.append(f"H {x2}")
-                        svg_cmds.append(f"V {y1}")
+                        cmd_buf.vert(y2)
+                        cmd_buf.horz(x2)
+                        cmd_buf.vert(y1)
                         y1 = y2 + norm_dist
                         y2 = y1 + tbslt_len
-                    svg_cmds.append(f"Z")
-                    svg_path = " ".join(svg_cmds)
-                    svg_paths.append(svg_path)
+                    cmd_buf.close()
+                    yield cmd_buf
+
+    def gen_compartment_table(self):
+        """
+        Generate the table of the compartments: their number of cells, inside width & length, area and volume.
+
+        :return:    nothing, the table is printed
+        """
+        print(f"{'#':>3} {'cells':>5} {'width':>8} {'length':>8} {'area':>10} {'volume':>12}")
+        for c in self.get_compartments():
+            print(f"{c.id:>3} {len(c.cells):>5} {c.width:>8.1f} {c.length:>8.1f} {c.area:>10.1f} {c.volume:>12.1f}")
+
+    def svg_size(self) -> Tuple[float, float]:
+        """
+        Calculate the width & height of the SVG document written by write_svg, without generating the parts.
+
+        :return:    the width & height (in the unit of the base)
+
+        the parts are laid out below the base: the inner walls followed by the outer walls, each part on its own
+        row. The width is the widest of the base and the parts (the length of the wall plus its joints), with the
+        same margin as between the parts.
+        """
+        self.require("walls")
+        extra_space = self.to_units(20)
+        inc_vos = self.depth_outer + self.mat_thick + extra_space
+        part_lens = [
+            seg_length(bslot.intersections[0].intrxn.x, bslot.intersections[0].intrxn.y,
+                       bslot.intersections[-1].intrxn.x, bslot.intersections[-1].intrxn.y)
+            for bslot in self.base_slots
+        ]
+        nbr_outer_walls = 0
+        for norm_dim_path in self.norm_dim_paths:
+            for curr_dim_pt in norm_dim_path.path_points:
+                part_lens.append(curr_dim_pt.outer_line_length(curr_dim_pt.next_dim_pt()))
+                nbr_outer_walls += 1
+        width = max([self.width] + [extra_space + part_len + 2 * self.mat_thick for part_len in part_lens])
+        height = self.inner_walls_end() + max(nbr_outer_walls - 1, 0) * inc_vos + self.mat_thick
+        return width + extra_space, height + extra_space
+
+    def part_groups(self) -> Iterator[Tuple[str, Iterable[CommandBuffer]]]:
+        """
+        Generate the command buffers of all the parts of the tray, by group: base (the paths & the slots of the
+        base), inner_walls & outer_walls.
+
+        :return:    an iterator of (group name, iterator of command buffers) pairs, the buffers of a group are
+                    generated one at a time
+        """
+        yield "base", chain([self.base_paths_buffer()], self.base_slot_parts())
+        yield "inner_walls", self.inner_wall_parts()
+        yield "outer_walls", self.outer_wall_parts(self.inner_walls_end())
+
+    def write_svg(self, fh, buffer_size: int = 65536, compact: bool = False) -> int:
+        """
+        Write the SVG document of the tray: the base (its paths & slots), the inner walls and the outer walls.
+
+        :param fh:          the (text) file-like object to write to, e.g., open("tray.svg", "w")
+        :param buffer_size: the number of characters buffered before they are written to fh
+        :param compact:     True to compact the paths (see CommandBuffer.compact) and use the shorter of the
+                            absolute & relative encoding of each command, for smaller files
+        :return:            the number of path elements written
+
+        the parts are generated and written one at a time (see SvgWriter), each in the group of its kind (base,
+        inner_walls & outer_walls).
+        """
+        width, height = self.svg_size()
+        with SvgWriter(fh, self.mm(width), self.mm(height), buffer_size) as writer:
+            for group, cmd_bufs in self.part_groups():
+                writer.start_group(group)
+                for cmd_buf in cmd_bufs:
+                    if compact:
+                        writer.write_path(cmd_buf.compact().svg_cmds(self.short_mm, relative=True))
+                    else:
+                        writer.write_path(cmd_buf.svg_cmds(self.mm))
+                writer.end_group()
+        return writer.nbr_paths
+
+    def write_dxf(self, fh, compact: bool = False) -> int:
+        """
+        Write the parts of the tray (see write_svg) as a DXF (R12) drawing of LINE entities, one layer per group.
 
-        svg_slots = "\n".join(svg_paths)
-        print(svg_slots)
+        :param fh:      the (text) file-like object to write to
+        :param compact: True to compact the paths first (see CommandBuffer.compact), for fewer lines
+        :return:        the number of lines written
+
+        the y-axis of a DXF drawing points up, so the y coordinates are flipped (measured from the bottom of the
+        SVG document).
+        """
+        _, height = self.svg_size()
+        nbr_lines = 0
+        fh.write("0\nSECTION\n2\nENTITIES\n")
+        for group, cmd_bufs in self.part_groups():
+            for cmd_buf in cmd_bufs:
+                entities = []
+                for points in (cmd_buf.compact() if compact else cmd_buf).subpaths():
+                    for (x1, y1), (x2, y2) in cyclic_n_tuples(points, 2, 0):
+                        entities.append(
+                            f"0\nLINE\n8\n{group}\n10\n{self.mm(x1)}\n20\n{self.mm(height - y1)}\n30\n0\n"
+                            f"11\n{self.mm(x2)}\n21\n{self.mm(height - y2)}\n31\n0\n"
+                        )
+                fh.write("".join(entities))
+                nbr_lines += len(entities)
+        fh.write("0\nENDSEC\n0\nEOF\n")
+        return nbr_lines
+
+    def turtle_view(self) -> st.View:
+        """
+        Convert the parts of the tray (see write_svg) to a svg_turtles View, e.g., for the svg_turtles.Debug
+        renderer: one Group per group of parts and one Path per subpath (in millimetres).
+        """
+        view = st.View()
+        for _, cmd_bufs in self.part_groups():
+            group = st.Group()
+            for cmd_buf in cmd_bufs:
+                for points in cmd_buf.subpaths():
+                    group.add_path(st.Path([st.Point(self.to_mm(x), self.to_mm(y)) for x, y in points]))
+            view.add_group(group)
+        return view
+
+    def gen_part_stats(self):
+        """
+        Generate the statistics of the parts: the number of path commands, the number of subpaths (i.e., the
+        cuts), the cut length (in millimetres) and the size of each part.
+
+        :return:    nothing, the statistics are printed
+        """
+        print(f"{'group':<12} {'part':>4} {'cmds':>6} {'cuts':>5} {'cut length':>11} {'width':>8} {'height':>8}")
+        tot_cmds = tot_cuts = tot_len = 0
+        for group, cmd_bufs in self.part_groups():
+            for part, cmd_buf in enumerate(cmd_bufs):
+                nbr_cuts = sum(op == CommandBuffer.MOVE for op in cmd_buf.ops)
+                cut_len = self.to_mm(cmd_buf.cut_length())
+                x1, y1, x2, y2 = cmd_buf.bounds()
+                print(
+                    f"{group:<12} {part:>4} {len(cmd_buf):>6} {nbr_cuts:>5} {cut_len:>11.1f} "
+                    f"{self.to_mm(x2 - x1):>8.1f} {self.to_mm(y2 - y1):>8.1f}"
+                )
+                tot_cmds += len(cmd_buf)
+                tot_cuts += nbr_cuts
+                tot_len += cut_len
+        print(f"{'total':<12} {'':>4} {tot_cmds:>6} {tot_cuts:>5} {tot_len:>11.1f}")
 
     def gen_svg_base_path(self, i: int = 0):
+        """
+        Generate the SVG path of the base for one of the normalized paths.
+
+        :param i:   the index of the path in norm_dim_paths
+        :return:    nothing, the path is printed
+
+        see gen_svg_base_paths to generate all the paths (including the holes) at once.
+        """
+        self.require("norm_paths")
+        holes = self.hole_paths(self.norm_index_paths)
+        cmd_buf = self.command_buffer()
+        self._base_path_buffer(self.norm_dim_paths[i], i in holes, cmd_buf)
+        print(" ".join(cmd_buf.svg_cmds(self.mm)))
+
+    def gen_svg_base_paths(self):
+        """
+        Generate a single SVG path of the base for all the normalized paths: the islands and the holes cut out of
+        them, the holes are listed before the outer contours, so they are cut first.
+
+        :return:    nothing, the path is printed
+        """
+        print(" ".join(self.base_paths_buffer().svg_cmds(self.mm)))
+
+    def base_paths_buffer(self) -> CommandBuffer:
+        """
+        Generate the path commands of the base for all the normalized paths, the holes before the outer contours
+        (see gen_svg_base_paths).
+
+        :return:    the command buffer
+        """
+        self.require("norm_paths")
+        holes = self.hole_paths(self.norm_index_paths)
+        cmd_buf = self.command_buffer()
+        for p in sorted(range(len(self.norm_dim_paths)), key=lambda p: p not in holes):
+            self._base_path_buffer(self.norm_dim_paths[p], p in holes, cmd_buf)
+        return cmd_buf
+
+    def hole_paths(self, i_paths: List[IndexPath]) -> Set[int]:
+        """
+        Find the paths that are holes, i.e., the paths that lie inside an odd number of the other paths.
+
+        :param i_paths: the index paths (the paths must not cross each other)
+        :return:        the indices of the paths that are holes
+        """
+        holes = set()
+        for p, i_path in enumerate(i_paths):
+            x, y = i_path.inner_cell()
+            # the paths do not cross, so a cell inside the path is inside another path if the whole path is
+            depth = sum(other.contains(x, y) for q, other in enumerate(i_paths) if q != p)
+            if depth % 2:
+                holes.add(p)
+        return holes
+
+    def _base_path_buffer(self, norm_dim_path: DimPath, hole: bool, cmd_buf: CommandBuffer):
+        """
+        Generate the path commands of the base along a normalized path.
+
+        :param norm_dim_path:   the normalized path
+        :param hole:            True if the path is a hole cut out of the base
+        :param cmd_buf:         the command buffer the commands are added to
+
+        the base follows the inside of the walls with fingers reaching to the outside of the walls. The base of
+        a hole is outside of its path, so the inside & outside points and corner sides swap roles.
+        """
         # TODO: we probably need different logic for base parts versus side walls parts
         # TODO: add logic to handle different kinds of line types (fingered / smooth)
         # TODO: for base parts do we need logic to determine the type of corner and then calculate the #f/s & be differently?
 
-        # TODO: analysis of consecutive collinear lines with the same type
-        #   do we group them together into 1 line
+        # consecutive collinear lines with the same type are grouped together into 1 line when the path is ended
+        #   (see IndexPath.compress)
 
         # print("=" * 100)
         # print(f"\tfinger length:         {self.fngr_len}")
@@ -1425,25 +3957,25 @@ class Base:
         # print(f"\tmaterial thickness:    {self.mat_thick}")
         # print(f"\tminimum beg / end len: {self.min_be_len}")
 
-        # TODO: make this loop over all dim_paths
-        norm_dim_path = self.norm_dim_paths[i]
+        edge, finger = ("outside", "inside") if hole else ("inside", "outside")
+        corner_sides = {"inside": "outside", "outside": "inside"} if hole else {"inside": "inside", "outside": "outside"}
         # print("-" * 100)
         # print(f"\tpath orientation: {norm_dim_path.path_ori}")
         # print("-" * 100)
 
         curr_dim_pt = norm_dim_path.path_points[0]
 
-        inside_point = curr_dim_pt.get("inside")
+        inside_point = curr_dim_pt.get(edge)
         # PATH CMD: MOVE TO 1st point on the path
         # TODO: will we need special logic to determine inside/outside corner & adjust x,y values?
-        path_cmds = [f"M {inside_point.x} {inside_point.y}"]
+        cmd_buf.move(inside_point.x, inside_point.y)
 
         for ctr, curr_dim_pt in enumerate(norm_dim_path.path_points, 1):
             next_dim_pt = curr_dim_pt.get_next_start()
 
             # begin processing of the current line(curr_dim_pt, next_dim_point)
-            curr_corner_side = curr_dim_pt.corner_side
-            next_corner_side = next_dim_pt.corner_side
+            curr_corner_side = corner_sides.get(curr_dim_pt.corner_side)
+            next_corner_side = corner_sides.get(next_dim_pt.corner_side)
 
             # print(
             #     f"*** [{ctr}] processing ***\n"
@@ -1462,89 +3994,87 @@ class Base:
             # )
 
             if curr_dim_pt.dire() == "right":
-                dir_coord = curr_dim_pt.get("inside").x
+                dir_coord = curr_dim_pt.get(edge).x
                 mult = 1
                 dir1 = "H"
                 dir2 = "V"
-                fp1_coord = curr_dim_pt.get("outside").y
-                fp2_coord = curr_dim_pt.get("inside").y
+                fp1_coord = curr_dim_pt.get(finger).y
+                fp2_coord = curr_dim_pt.get(edge).y
             elif curr_dim_pt.dire() == "left":
-                dir_coord = curr_dim_pt.get("inside").x
+                dir_coord = curr_dim_pt.get(edge).x
                 mult = -1
                 dir1 = "H"
                 dir2 = "V"
-                fp1_coord = curr_dim_pt.get("outside").y
-                fp2_coord = curr_dim_pt.get("inside").y
+                fp1_coord = curr_dim_pt.get(finger).y
+                fp2_coord = curr_dim_pt.get(edge).y
             elif curr_dim_pt.dire() == "down":
-                dir_coord = curr_dim_pt.get("inside").y
+                dir_coord = curr_dim_pt.get(edge).y
                 mult = 1
                 dir1 = "V"
                 dir2 = "H"
-                fp1_coord = curr_dim_pt.get("outside").x
-                fp2_coord = curr_dim_pt.get("inside").x
+                fp1_coord = curr_dim_pt.get(finger).x
+                fp2_coord = curr_dim_pt.get(edge).x
             else:
-                dir_coord = curr_dim_pt.get("inside").y
+                dir_coord = curr_dim_pt.get(edge).y
                 mult = -1
                 dir1 = "V"
                 dir2 = "H"
-                fp1_coord = curr_dim_pt.get("outside").x
-                fp2_coord = curr_dim_pt.get("inside").x
+                fp1_coord = curr_dim_pt.get(finger).x
+                fp2_coord = curr_dim_pt.get(edge).x
 
-            # path_cmds.append("\n\n")
+            # cmd_buf.append("\n\n")
             if curr_corner_side == "inside":
                 dir_coord += mult * self.mat_thick
-                # path_cmds.append(f"<<< {dir1} {dir_coord} <<<")
-                path_cmds.append(f"{dir1} {dir_coord}")
+                # cmd_buf.append(f"<<< {dir1} {dir_coord} <<<")
+                cmd_buf.line(dir1, dir_coord)
 
             # create PATH for beginning BEG-END
             # PATH CMD: go-to the dir_cord adjusted for the beg-end length
             dir_coord += mult * be_len
-            path_cmds.append(f"{dir1} {dir_coord}")
-
-            # create PATH for N number of FINGER-SPACE pairs
-            for _ in range(nbr_of_spcs):
-                # PATH CMD: go-to finger point outside
-                path_cmds.append(f"{dir2} {fp1_coord}")
-                # PATH CMD: go to the dir_cord adjusted for the finger length
-                dir_coord += mult * self.fngr_len
-                path_cmds.append(f"{dir1} {dir_coord}")
-                # PATH CMD: go to finger point inside
-                path_cmds.append(f"{dir2} {fp2_coord}")
-                # PATH CMD: go to the dir_cord adjusted for the space length
-                dir_coord += mult * self.spc_len
-                path_cmds.append(f"{dir1} {dir_coord}")
-
-            # create PATH for last FINGER
-            # PATH CMD: go-to finger point outside
-            path_cmds.append(f"{dir2} {fp1_coord}")
-            # PATH CMD: go to the dir_cord adjusted for the finger length
-            dir_coord += mult * self.fngr_len
-            path_cmds.append(f"{dir1} {dir_coord}")
-            # PATH CMD: go to finger point inside
-            path_cmds.append(f"{dir2} {fp2_coord}")
+            cmd_buf.line(dir1, dir_coord)
+
+            # create PATH for N number of FINGER-SPACE pairs and the last FINGER
+            # PATH CMDs: go-to finger point outside, go to the dir_cord adjusted for the finger length, go to
+            #   finger point inside, go to the dir_cord adjusted for the space length
+            dir_coord = cmd_buf.fingers(
+                dir1, dir_coord, mult, self.fngr_len, self.spc_len, nbr_of_spcs, fp1_coord, fp2_coord
+            )
 
             # create PATH for beginning BEG-END
             # PATH CMD: go-to the dir_cord adjusted for the beg-end length
             dir_coord += mult * be_len
-            path_cmds.append(f"{dir1} {dir_coord}")
+            cmd_buf.line(dir1, dir_coord)
 
             if next_corner_side == "inside":
                 dir_coord += mult * self.mat_thick
-                # path_cmds.append(f">>> {dir1} {dir_coord} >>>")
-                path_cmds.append(f"{dir1} {dir_coord}")
-
-        path_cmds.append("Z")
-        svg_path = " ".join(path_cmds)
-        print(svg_path)
+                # cmd_buf.append(f">>> {dir1} {dir_coord} >>>")
+                cmd_buf.line(dir1, dir_coord)
 
+        cmd_buf.close()
 
     def gen_svg_path_raw(self, i: int = 0, dim: str = "outside"):
-        dim_path = self.dim_paths[i]
+        self.require("dim_paths")
+        cmd_buf = self.command_buffer()
+        self._raw_path_buffer(self.dim_paths[i], dim, cmd_buf)
+        return " ".join(cmd_buf.svg_cmds(self.mm))
+
+    def gen_svg_paths_raw(self, dim: str = "outside"):
+        """
+        Generate a single raw SVG path for all the DimPaths, the holes (see hole_paths) before the outer contours.
+        """
+        self.require("dim_paths")
+        holes = self.hole_paths(self.index_paths)
+        cmd_buf = self.command_buffer()
+        for p in sorted(range(len(self.dim_paths)), key=lambda p: p not in holes):
+            self._raw_path_buffer(self.dim_paths[p], dim, cmd_buf)
+        return " ".join(cmd_buf.svg_cmds(self.mm))
+
+    def _raw_path_buffer(self, dim_path: DimPath, dim: str, cmd_buf: CommandBuffer):
 
         # the first point on the path is used for the Move To command
         move_to_dim = dim_path.path_points[0]
         point = move_to_dim.get(dim)
-        svg_path_list = [f"M {point.x} {point.y}"]
+        cmd_buf.move(point.x, point.y)
 
         # the direction of the first point is used to determine if a horizontal line
         #   or a vertical line should be drawn when consuming the second point
@@ -1555,37 +4085,43 @@ class Base:
         for dim_point in dim_path.path_points[1:]:
             point = dim_point.get(dim)
             if prev_dire in ["left", "right"]:
-                svg_path_list.append(f"H {point.x}")
+                cmd_buf.horz(point.x)
             else:
-                svg_path_list.append(f"V {point.y}")
+                cmd_buf.vert(point.y)
             prev_dire = dim_point.direction
 
-        svg_path_list.append("Z")
-        return " ".join(svg_path_list)
+        cmd_buf.close()
 
     def start_path(self, x_index: int, y_index: int, line_type: str = "finger"):
+        self.invalidate("dim_paths")
         point = IndexPoint(x_index, y_index, line_type)
         path = IndexPath(point)
         self.index_paths.append(path)
 
     def extend_path(self, x_index, y_index, line_type: str = "finger"):
+        self.invalidate("dim_paths")
         path = self.index_paths[-1]
         point = IndexPoint(x_index, y_index, line_type)
         path.add_point(point)
 
     def end_path(self):
+        self.invalidate("dim_paths")
         path = self.index_paths[-1]
-        path.orientation = self.orientation(path)
+        path.orientation = self.validate_path(path)
+        # drop the intermediate points of collinear runs, so they don't become separate lines / walls
+        path.compress()
 
     def add_wall(self, start: Tuple[int, int], end: Tuple[int, int], wall_type: str = "tab_slot"):
+        self.invalidate("walls")
         p1 = IndexPoint(*start)
         p2 = IndexPoint(*end)
         wall = IndexWall(p1, p2, wall_type)
         self.index_walls.append(wall)
 
     def add_base_wall(self, start: IndexPoint, end: IndexPoint, wall_type: str = "finger"):
+        # the base walls are kept apart from the interior walls, as they are (re-)created by create_path_walls
         wall = IndexWall(start, end, wall_type)
-        self.index_walls.append(wall)
+        self.path_index_walls.append(wall)
 
 
     @classmethod
@@ -1611,73 +4147,179 @@ class Base:
         """
         return cls.direction_dims[ori][dire1][dire2]
 
+    @stage("path_walls", "norm_paths")
     def create_path_walls(self):
         for norm_index_path in self.norm_index_paths:
             for curr_pt, next_pt in cyclic_n_tuples(norm_index_path.index_points, 2, 0):
                 self.add_base_wall(curr_pt, next_pt, "finger")
 
+    @stage("walls", "path_walls")
     def proc_walls(self):
+        """
+        Find the intersections of the walls and create the base slots and exterior walls from them.
+
+        the junctions are classified on the column / row lattice if lattice_walls is set, otherwise by intersecting
+        the walls (see WallSweep).
+        """
+        if self._lattice_walls:
+            self._proc_walls_lattice()
+            return
+
         # print("-" * 100)
         walls_horz = []
         walls_vert = []
+        # the column index of each vertical wall & the row index of each horizontal wall
+        walls_horz_y = []
+        walls_vert_x = []
 
         # loop over the exterior walls (auto generated by create_path_walls()) and the
         #   interior walls (manually created by calling add_wall())
-        for index_wall in self.index_walls:
+        for index_wall in self.merge_index_walls(self.index_walls) + self.path_index_walls:
             start_avg_pt = self.get_avg_agg_point(index_wall.start_pt)
             end_avg_pt = self.get_avg_agg_point(index_wall.end_pt)
-            wall = Wall(start_avg_pt, end_avg_pt, index_wall.wall_type, index_wall.start_pt.dim_point)
+            wall = Wall(
+                start_avg_pt, end_avg_pt, index_wall.wall_type, index_wall.start_pt.dim_point, next(self.wall_seq)
+            )
             if wall.super_direction == "horz":
                 walls_horz.append(wall)
+                walls_horz_y.append(index_wall.start_pt.y_index)
             else:
                 walls_vert.append(wall)
+                walls_vert_x.append(index_wall.start_pt.x_index)
             # print(f"{wall} -- {index_wall.start_pt} {index_wall.end_pt}")
 
+        # the sweep generates the intersections already sorted for each wall slot, but not in the order the walls
+        #   were added. the order key (horz wall index, vert wall index, horz / vert) of the first intersection of a
+        #   wall is used to list the slots in the same order as testing every horizontal wall (outer loop) against
+        #   every vertical wall (inner loop) would find them.
         bslots = {}
         exterior_walls = {}
-        for wall_h in walls_horz:
-            for wall_v in walls_vert:
-                x_type, x_subtype, x_point = wall_h.intersect(wall_v)
-                # print(f"horz #{wall_h.id} vert #{wall_v.id} : intersection {x_type}, {x_subtype}, {x_point}")
-                if x_type:
-                    if wall_h.type == "tab_slot":
-                        bslots.setdefault(wall_h.id, WallSlot('horz')).add(x_point, x_type, x_subtype)
-                        # print("added to horz base slot")
-                    elif wall_h.type == "finger":
-                        exterior_walls.setdefault(wall_h.id, WallSlot('horz')).add(x_point, x_type, x_subtype, wall_h.dim_pt)
-                    if wall_v.type == "tab_slot":
-                        bslots.setdefault(wall_v.id, WallSlot('vert')).add(x_point, x_type, x_subtype)
-                        # print("added to vert base slot")
-                    elif wall_v.type == "finger":
-                        exterior_walls.setdefault(wall_v.id, WallSlot('vert')).add(x_point, x_type, x_subtype, wall_v.dim_pt)
-
-        for val in bslots.values():
-            self.base_slots.append(val)
+        order_keys = {}
+        for h_ndx, v_ndx, x_type, x_subtype, x_point in WallSweep(walls_horz, walls_vert).intersections():
+            wall_h = walls_horz[h_ndx]
+            wall_v = walls_vert[v_ndx]
+            gxy = (walls_vert_x[v_ndx], walls_horz_y[h_ndx])
+            self.track_point("walls", x_point, *gxy)
+            for wall, order_key in ((wall_h, (h_ndx, v_ndx, 0)), (wall_v, (h_ndx, v_ndx, 1))):
+                if wall.type == "tab_slot":
+                    bslots.setdefault(wall.id, WallSlot(wall.super_direction, is_sorted=True)).add(
+                        x_point, x_type, x_subtype, gxy=gxy
+                    )
+                elif wall.type == "finger":
+                    exterior_walls.setdefault(wall.id, WallSlot(wall.super_direction, is_sorted=True)).add(
+                        x_point, x_type, x_subtype, wall.dim_pt, gxy
+                    )
+                else:
+                    continue
+                order_keys[wall.id] = min(order_key, order_keys.get(wall.id, order_key))
+
+        for wall_id in sorted(bslots, key=order_keys.get):
+            self.base_slots.append(bslots[wall_id])
 
         # TODO: do we still need the self.exterior_walls attribute?
         #   we only use it in the gen_svg_outer_walls_2() method
         #   and I don't think this method can be finished, because it is flawed
-        for val in exterior_walls.values():
-            self.exterior_walls.append(val)
+        for wall_id in sorted(exterior_walls, key=order_keys.get):
+            self.exterior_walls.append(exterior_walls[wall_id])
 
         print("-" * 100)
 
+    @staticmethod
+    def merge_index_walls(index_walls: List[IndexWall]) -> List[IndexWall]:
+        """
+        Merge the collinear walls of the same type that overlap or abut.
+
+        :param index_walls: the walls to merge (e.g., the interior walls added by add_wall)
+        :return:            the merged walls
+
+        the walls are grouped by their grid line (horizontal walls by row, vertical walls by column) and wall type,
+        the walls of a group are sorted by their start and each wall that starts before or where the current merged
+        wall ends is merged into it, so exact duplicates are dropped and (0,1)-(2,1) + (2,1)-(4,1) becomes
+        (0,1)-(4,1). The groups are listed in the order their first wall was added.
+
+        walls that are neither horizontal nor vertical are returned unchanged (Wall will reject them).
+        """
+        groups: Dict[Tuple[str, int, str], List[Tuple[int, int]]] = {}
+        merged = []
+        for index_wall in index_walls:
+            (x1, y1), (x2, y2) = index_wall.start_pt.gxy, index_wall.end_pt.gxy
+            if y1 == y2:
+                groups.setdefault(("horz", y1, index_wall.wall_type), []).append((min(x1, x2), max(x1, x2)))
+            elif x1 == x2:
+                groups.setdefault(("vert", x1, index_wall.wall_type), []).append((min(y1, y2), max(y1, y2)))
+            else:
+                merged.append(index_wall)
+
+        for (super_direction, line, wall_type), spans in groups.items():
+            spans.sort()
+            runs = [list(spans[0])]
+            for lo, hi in spans[1:]:
+                if lo <= runs[-1][1]:
+                    runs[-1][1] = max(runs[-1][1], hi)
+                else:
+                    runs.append([lo, hi])
+            for lo, hi in runs:
+                if super_direction == "horz":
+                    merged.append(IndexWall(IndexPoint(lo, line), IndexPoint(hi, line), wall_type))
+                else:
+                    merged.append(IndexWall(IndexPoint(line, lo), IndexPoint(line, hi), wall_type))
+        return merged
+
+    def _proc_walls_lattice(self):
+        index_walls = self.merge_index_walls(self.index_walls) + self.path_index_walls
+        lattice = WallLattice(self.nbr_cols, self.nbr_rows)
+        # the index of each wall among the walls of its super direction (as in walls_horz & walls_vert of proc_walls)
+        #   and, for each super direction & node, the index of the first wall through the node
+        wall_ndxs = []
+        nbr_walls = {"horz": 0, "vert": 0}
+        first_walls: Dict[Tuple[str, int, int], int] = {}
+        for index_wall in index_walls:
+            start, end = index_wall.start_pt.gxy, index_wall.end_pt.gxy
+            super_direction = lattice.add(start, end)
+            wall_ndx = nbr_walls[super_direction]
+            nbr_walls[super_direction] += 1
+            wall_ndxs.append(wall_ndx)
+            for x, y in lattice.nodes(start, end):
+                first_walls.setdefault((super_direction, x, y), wall_ndx)
+        lattice.classify()
+
+        # the junctions of a wall are generated in order, so each wall slot is already sorted. the slots are listed
+        #   in the same order as proc_walls lists them: by the order key (horz wall index, vert wall index, horz / vert)
+        #   of their first junction, the other wall of a junction being the first wall through its node (the first
+        #   one that testing every horizontal wall against every vertical wall would pair the wall with)
+        bslots = []
+        exterior_walls = []
+        for index_wall, wall_ndx in zip(index_walls, wall_ndxs):
+            if index_wall.wall_type == "tab_slot":
+                dim_pt, wall_slots = None, bslots
+            elif index_wall.wall_type == "finger":
+                dim_pt, wall_slots = index_wall.start_pt.dim_point, exterior_walls
+            else:
+                continue
+            start, end = index_wall.start_pt.gxy, index_wall.end_pt.gxy
+            wall_slot = WallSlot("horz" if start[1] == end[1] else "vert", is_sorted=True)
+            order_key = None
+            for x, y, x_type, x_subtype in lattice.wall_junctions(start, end):
+                x_point = self.track_point("walls", self.agg_coords.avg(x, y), x, y)
+                wall_slot.add(x_point, x_type, x_subtype, dim_pt, (x, y))
+                if wall_slot.type == "horz":
+                    key = (wall_ndx, first_walls["vert", x, y], 0)
+                else:
+                    key = (first_walls["horz", x, y], wall_ndx, 1)
+                order_key = key if order_key is None else min(order_key, key)
+            if wall_slot.intersections:
+                wall_slots.append((order_key, wall_slot))
+
+        self.base_slots.extend(wall_slot for _, wall_slot in sorted(bslots, key=itemgetter(0)))
+        self.exterior_walls.extend(wall_slot for _, wall_slot in sorted(exterior_walls, key=itemgetter(0)))
+
     def calc_tbslt_len(self, oc_pt1: Point, oc_pt2: Point) -> Tuple[float, int]:
         # I'm guessing that the max_tbslt_bt_xs variable is the MAX number of tabs (or slots) between 2 intersections
-        tbslt_len = n = -1
-        span_len = Line(oc_pt1, oc_pt2).length()
-        tot_spc_len = (2 * self.wall_tbslt_dist) + self.mat_thick
-        # print(f">> pt1: {oc_pt1} {oc_pt2} span len {span_len} - 2wts+mt: {tot_spc_len}")
-        for n in range(self.max_tbslt_bt_xs, 0, -1):
-            tbslt_len = (span_len - (n * tot_spc_len)) / n
-            # print(f"   nbr of slots {n} of length {tbslt_len}")
-            if tbslt_len >= self.min_tbslt_len:
-                # print(f"   meets min slot len of {self.min_tbslt_len}")
-                break
-        # print(f">> final: {n} slots of {tbslt_len}")
-        return tbslt_len, n
+        # the plan is looked up in the joint plan of the base (see JointPlan)
+        return self.get_joint_plan().tabs(seg_length(oc_pt1.x, oc_pt1.y, oc_pt2.x, oc_pt2.y))
 
     def st_base_path(self):
+        self.require("norm_paths")
         # norm_dim_paths is a list of DimPath object
         for n_dim_path in self.norm_dim_paths:
             # a DimPath obj has: path_ori (cw, ccw) and path_points (list of DimPoint objs)
@@ -1699,14 +4341,9 @@ def main():
     Test.detail_design(base)
 
     #
-    # do the calculations
+    # the calculations (calc_dim_paths, normalize_paths, create_path_walls & proc_walls) are done on demand
     #
 
-    base.calc_dim_paths()
-    base.normalize_paths()
-    base.create_path_walls()
-    base.proc_walls()
-
     # base.gen_svg_base_path()
     # base.gen_svg_base_slots()
     # y_pos = base.gen_svg_inner_walls()
@@ -1714,9 +4351,82 @@ def main():
 
     base.st_base_path()
 
+    Test.check_svg(base)
+    Test.check_output(base)
+    Test.check_snapshot(base)
+
     print("\n\nDONE")
 
 class Test:
+    # the SVG paths printed by the gen_svg_* methods for the base_5 base with the detail_design paths & walls, as
+    #   printed when the aggregate grid was a list of AggregatePoint objects: the raw outside & inside paths, the
+    #   base path, the base slots, the inner walls and the outer walls
+    base_5_svg: Tuple[str, ...] = (
+        "M 0 0 H 200.0 V 200.0 H 0 Z",
+        "M 5 5 H 195.0 V 195.0 H 5 Z",
+        (
+            "M 5 5 H 12.5 V 0 H 27.5 V 5 H 52.5 V 0 H 67.5 V 5 H 92.5 V 0 H 107.5 V 5 H 132.5 V 0 H 147.5 V 5 H "
+            "172.5 V 0 H 187.5 V 5 H 195.0 V 12.5 H 200.0 V 27.5 H 195.0 V 52.5 H 200.0 V 67.5 H 195.0 V 92.5 H "
+            "200.0 V 107.5 H 195.0 V 132.5 H 200.0 V 147.5 H 195.0 V 172.5 H 200.0 V 187.5 H 195.0 V 195.0 H "
+            "187.5 V 200.0 H 172.5 V 195.0 H 147.5 V 200.0 H 132.5 V 195.0 H 107.5 V 200.0 H 92.5 V 195.0 H 67.5 "
+            "V 200.0 H 52.5 V 195.0 H 27.5 V 200.0 H 12.5 V 195.0 H 5.0 V 187.5 H 0 V 172.5 H 5 V 147.5 H 0 V "
+            "132.5 H 5 V 107.5 H 0 V 92.5 H 5 V 67.5 H 0 V 52.5 H 5 V 27.5 H 0 V 12.5 H 5 V 5.0 Z"
+        ),
+        "M 10.0 72.5 H 42.5 V 77.5 H 10.0 Z",
+        "M 57.5 72.5 H 117.5 V 77.5 H 57.5 Z",
+        "M 132.5 72.5 H 190.0 V 77.5 H 132.5 Z",
+        "M 52.5 10.0 V 67.5 H 47.5 V 10.0 Z",
+        "M 52.5 82.5 V 128.75 H 47.5 V 82.5 Z",
+        "M 52.5 143.75 V 190.0 H 47.5 V 143.75 Z",
+        "M 127.5 82.5 V 128.75 H 122.5 V 82.5 Z",
+        "M 127.5 143.75 V 190.0 H 122.5 V 143.75 Z",
+        (
+            "M 215.0 295.0 V 290.0 H 220.0 V 260.0 H 215.0 V 255.0 H 220.0 V 225.0 H 215.0 V 220.0 H 142.5 H 67.5 "
+            "H 25 V 225.0 H 20 V 255.0 H 25 V 260.0 H 20 V 290.0 H 25 V 295.0 H 30 V 300.0 H 62.5 V 295.0 H 67.5 "
+            "V 257.5 H 72.5 V 295.0 H 77.5 V 300.0 H 137.5 V 295.0 H 152.5 V 300.0 H 210.0 V 295.0 Z M 147.5 "
+            "290.0 H 142.5 V 260.0 H 147.5 Z M 147.5 255.0 H 142.5 V 225.0 H 147.5 Z"
+        ),
+        (
+            "M 215.0 395.0 V 390.0 H 220.0 V 360.0 H 215.0 V 355.0 H 220.0 V 325.0 H 215.0 V 320.0 H 97.5 V 357.5 "
+            "H 92.5 V 320.0 H 25 V 325.0 H 20 V 355.0 H 25 V 360.0 H 20 V 390.0 H 25 V 395.0 H 30 V 400.0 H 87.5 "
+            "V 395.0 H 102.5 V 400.0 H 148.75 V 395.0 H 163.75 V 400.0 H 210.0 V 395.0 Z"
+        ),
+        (
+            "M 142.5 495.0 V 490.0 H 147.5 V 460.0 H 142.5 V 455.0 H 147.5 V 425.0 H 142.5 V 420.0 H 25 V 425.0 H "
+            "20 V 455.0 H 25 V 460.0 H 20 V 490.0 H 25 V 495.0 H 30 V 500.0 H 76.25 V 495.0 H 91.25 V 500.0 H "
+            "137.5 V 495.0 Z"
+        ),
+        (
+            "M 20 595.0 V 600.0 H 25 H 32.5 V 595.0 H 47.5 V 600.0 H 72.5 V 595.0 H 87.5 V 600.0 H 112.5 V 595.0 "
+            "H 127.5 V 600.0 H 152.5 V 595.0 H 167.5 V 600.0 H 192.5 V 595.0 H 207.5 V 600.0 H 215.0 H 220.0 V "
+            "595.0 V 587.5 H 215.0 V 572.5 H 220.0 V 547.5 H 215.0 V 532.5 H 220.0 V 520.0 H 20.0 V 532.5 H 25.0 "
+            "V 547.5 H 20.0 V 572.5 H 25.0 V 587.5 H 20.0 V 595.0 V 600.0 Z M 67.5 590.0 H 72.5 V 560.0 H 67.5 Z "
+            "M 67.5 555.0 H 72.5 V 525.0 H 67.5 Z"
+        ),
+        (
+            "M 25 695.0 V 700.0 H 32.5 V 695.0 H 47.5 V 700.0 H 72.5 V 695.0 H 87.5 V 700.0 H 112.5 V 695.0 H "
+            "127.5 V 700.0 H 152.5 V 695.0 H 167.5 V 700.0 H 192.5 V 695.0 H 207.5 V 700.0 H 215.0 V 695.0 V "
+            "687.5 H 220.0 V 672.5 H 215.0 V 647.5 H 220.0 V 632.5 H 215.0 V 620.0 H 25.0 V 632.5 H 20.0 V 647.5 "
+            "H 25.0 V 672.5 H 20.0 V 687.5 H 25.0 V 695.0 V 700.0 Z M 92.5 690.0 H 97.5 V 660.0 H 92.5 Z M 92.5 "
+            "655.0 H 97.5 V 625.0 H 92.5 Z"
+        ),
+        (
+            "M 20 795.0 V 800.0 H 25 H 32.5 V 795.0 H 47.5 V 800.0 H 72.5 V 795.0 H 87.5 V 800.0 H 112.5 V 795.0 "
+            "H 127.5 V 800.0 H 152.5 V 795.0 H 167.5 V 800.0 H 192.5 V 795.0 H 207.5 V 800.0 H 215.0 H 220.0 V "
+            "795.0 V 787.5 H 215.0 V 772.5 H 220.0 V 747.5 H 215.0 V 732.5 H 220.0 V 720.0 H 20.0 V 732.5 H 25.0 "
+            "V 747.5 H 20.0 V 772.5 H 25.0 V 787.5 H 20.0 V 795.0 V 800.0 Z M 167.5 790.0 H 172.5 V 760.0 H 167.5 "
+            "Z M 167.5 755.0 H 172.5 V 725.0 H 167.5 Z M 92.5 790.0 H 97.5 V 760.0 H 92.5 Z M 92.5 755.0 H 97.5 V "
+            "725.0 H 92.5 Z"
+        ),
+        (
+            "M 25 895.0 V 900.0 H 32.5 V 895.0 H 47.5 V 900.0 H 72.5 V 895.0 H 87.5 V 900.0 H 112.5 V 895.0 H "
+            "127.5 V 900.0 H 152.5 V 895.0 H 167.5 V 900.0 H 192.5 V 895.0 H 207.5 V 900.0 H 215.0 V 895.0 V "
+            "887.5 H 220.0 V 872.5 H 215.0 V 847.5 H 220.0 V 832.5 H 215.0 V 820.0 H 25.0 V 832.5 H 20.0 V 847.5 "
+            "H 25.0 V 872.5 H 20.0 V 887.5 H 25.0 V 895.0 V 900.0 Z M 142.5 890.0 H 147.5 V 860.0 H 142.5 Z M "
+            "142.5 855.0 H 147.5 V 825.0 H 142.5 Z"
+        ),
+    )
+
     @staticmethod
     def base_5():
         # this base has non-symmetric col & row layout
@@ -1749,6 +4459,50 @@ class Test:
         base.add_wall((0, 1), (3, 1))
         base.add_wall((2, 1), (2, 2))
 
+    @staticmethod
+    def check_svg(base):
+        # the streamed SVG document (default & compact) must be well-formed XML, with one group per part group
+        for compact in (False, True):
+            fh = io.StringIO()
+            base.write_svg(fh, compact=compact)
+            doc = minidom.parseString(fh.getvalue())
+            groups = [group.getAttribute("id") for group in doc.getElementsByTagName("g")]
+            if groups != ["base", "inner_walls", "outer_walls"]:
+                raise ValueError(f"unexpected groups in the SVG document: {groups}")
+
+    @staticmethod
+    def check_output(base):
+        # the SVG paths of the base_5 / detail_design base must be byte for byte the same as the base_5_svg paths
+        base.require("walls")
+        lines = [base.gen_svg_path_raw(0, "outside"), base.gen_svg_path_raw(0, "inside")]
+        fh = io.StringIO()
+        with contextlib.redirect_stdout(fh):
+            base.gen_svg_base_path()
+            base.gen_svg_base_slots()
+            base.gen_svg_outer_walls(base.gen_svg_inner_walls())
+        lines.extend(fh.getvalue().splitlines())
+        for n, (line, expected) in enumerate(zip_longest(lines, Test.base_5_svg)):
+            if line != expected:
+                raise ValueError(f"SVG path {n} differs from the base_5 output: {line!r} instead of {expected!r}")
+
+        # the streamed SVG document has the same paths, less the raw paths
+        fh = io.StringIO()
+        base.write_svg(fh)
+        paths = [path.getAttribute("d") for path in minidom.parseString(fh.getvalue()).getElementsByTagName("path")]
+        for n, (path, expected) in enumerate(zip_longest(paths, Test.base_5_svg[2:])):
+            if path != expected:
+                raise ValueError(f"SVG document path {n} differs from the base_5 output: {path!r} vs {expected!r}")
+
+    @staticmethod
+    def check_snapshot(base):
+        # a base restored from its snapshot must write the same SVG document, byte for byte
+        before = io.StringIO()
+        base.write_svg(before)
+        after = io.StringIO()
+        Base.from_snapshot(base.snapshot()).write_svg(after)
+        if after.getvalue() != before.getvalue():
+            raise ValueError("the SVG document of the base restored from its snapshot differs from the base's")
+
 
 if __name__ == "__main__":
     main()
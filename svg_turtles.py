@@ -3,7 +3,7 @@ from __future__ import annotations
 from itertools import count
 
 from enum import Enum
-from typing import Tuple, List, Optional, Dict, Any, Protocol
+from typing import Tuple, List, Optional, Dict, Any, Protocol, Iterator
 
 from cyclic_n_tuples import fwd_pair
 
@@ -37,7 +37,6 @@ class Debug:
 
 
 class Svg:
-    seq = count(1)
     xml_str = '<?xml version="1.0" encoding="UTF-8" standalone="no"?>'
     doc_str = '<!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.1//EN" "http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd">'
     svg_boiler_plate = (
@@ -76,8 +75,11 @@ class Svg:
         return path_elm
 
     @classmethod
-    def render_group(cls, group_obj: Group):
-        group = [f'<g id="p-{next(cls.seq)}">']
+    def render_group(cls, group_obj: Group, seq: Iterator[int] = None):
+        # the group ids are assigned from a sequence per rendered view, so the output does not depend on
+        #   previously rendered views
+        seq = seq or count(1)
+        group = [f'<g id="p-{next(seq)}">']
         for path in group_obj.paths:
             path_elm = cls.render_path(path, group_obj.origin)
             group.append(f"\t\t{path_elm}")
@@ -94,8 +96,9 @@ class Svg:
             f'viewBox="0 0 {max_x} {max_y}" '
             f'{cls.svg_boiler_plate}>'
         ]
+        seq = count(1)
         for group in view_obj.groups:
-            group_elm = cls.render_group(group)
+            group_elm = cls.render_group(group, seq)
             view.append(f"\t{group_elm}")
         view.append("</svg>")
         view_elm = "\n".join(view)
@@ -115,6 +118,8 @@ class Direction(Enum):
 
 
 class Point:
+    __slots__ = ("x", "y", "attribs")
+
     def __init__(self, x: float, y: float, attribs: Dict[str, Any] = None):
         self.x = x
         self.y = y
@@ -201,6 +206,8 @@ class View:
 
 
 class NamedLocation:
+    __slots__ = ("x", "y", "h", "n")
+
     def __init__(self, x: float, y: float, h: Heading, n: str):
         self.x = x
         self.y = y